@@ -1,26 +1,420 @@
+import asyncio
+import concurrent.futures
+import importlib.util
 import os
-from typing import Any
+import random
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Coroutine, Optional, TypeVar
 
 import httpx
-import requests
+
+from analysis.api.decoding import Decoding
+from analysis.api.metrics import Metrics
+from analysis.api.rate_limiter import RateLimiter
+from analysis.api.response_cache import ResponseCache
+
+T = TypeVar("T")
+
+
+class APIError(Exception):
+    """
+    Raised when a request still fails after all retries.
+    """
 
 
 class BaseAPI:
-    _API_BASE_URL = "https://financialmodelingprep.com/api"
+    _DEFAULT_API_BASE_URL = "https://financialmodelingprep.com/api"
+
+    # Connection pool settings shared by every API call in the process.
+    _MAX_CONNECTIONS = 20
+    _MAX_KEEPALIVE_CONNECTIONS = 10
+    _KEEPALIVE_EXPIRY = 30.0
+    _CONNECT_TIMEOUT = 5.0
+    _READ_TIMEOUT = 30.0
+
+    # Request rate, concurrency and retry settings.
+    _REQUESTS_PER_MINUTE = int(os.environ.get("FMP_REQUESTS_PER_MINUTE", 300))
+    _BURST = int(os.environ.get("FMP_BURST", 30))
+    _MAX_CONCURRENCY = 32
+    _TARGET_LATENCY = 2.0
+    _MAX_RETRIES = 4
+    _BACKOFF_BASE = 0.5
+    _BACKOFF_CAP = 30.0
+    # Longest Retry-After the server can make a single attempt wait for.
+    _RETRY_AFTER_CAP = 60.0
+    _RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+    # With ASYNC_DEBUG set, BaseAPI.run logs any step of a coroutine that blocks
+    # the event loop for longer than this many seconds.
+    _SLOW_CALLBACK_DURATION = float(os.environ.get("ASYNC_SLOW_CALLBACK", 0.1))
+
+    # Connections belong to the event loop they were opened on, so one client is
+    # kept per loop. Streamlit sessions each run BaseAPI.run on their own thread.
+    _clients: weakref.WeakKeyDictionary[
+        asyncio.AbstractEventLoop, httpx.AsyncClient
+    ] = weakref.WeakKeyDictionary()
+    _clients_lock = threading.Lock()
+    _cache: Optional[ResponseCache] = None
+    _rate_limiter: Optional[RateLimiter] = None
+
+    # Closes other loop-bound clients (e.g. async MongoDB) along with this one.
+    _close_callbacks: list[Callable[[], Awaitable[None]]] = []
+
+    # Requests in flight by cache key, shared by callers on every event loop in
+    # the process, and the number of requests that joined one instead of being
+    # sent.
+    _flights: dict[str, concurrent.futures.Future] = {}
+    _flights_lock = threading.Lock()
+    deduplicated = 0
 
     @staticmethod
-    def _get_request(url: str, params: Any) -> Any:
-        params["apikey"] = BaseAPI._get_api_key()
-        response = requests.get(url=BaseAPI._API_BASE_URL + url, params=params)
-        return response.json()
+    async def _get_async(
+        url, params: Any, use_cache: bool = True, refresh: bool = False
+    ) -> Any:
+        """
+        Returns the response to a GET request, from the cache if possible. With
+        refresh set, the cache isn't read but is still updated with the response.
+
+        An identical request already in flight on any event loop in the process
+        is joined instead of sent again, so every caller gets the same result
+        object or the same exception. The result is shared rather than copied,
+        so callers must treat it as read-only and copy it before modifying it.
+        """
+        endpoint = BaseAPI._get_endpoint(url)
+        cache = BaseAPI.get_cache() if use_cache else None
+        if cache is not None and not refresh:
+            cached = cache.get(url, params)
+            if cached is not None:
+                Metrics.increment("fmp_cache_hits_total", endpoint=endpoint)
+                return cached
+            Metrics.increment("fmp_cache_misses_total", endpoint=endpoint)
+
+        key = ResponseCache.get_key(url, params)
+        with BaseAPI._flights_lock:
+            joined = BaseAPI._flights.get(key)
+            if joined is not None:
+                BaseAPI.deduplicated += 1
+            else:
+                flight: concurrent.futures.Future = concurrent.futures.Future()
+                BaseAPI._flights[key] = flight
+
+        if joined is not None:
+            Metrics.increment("fmp_deduplicated_total", endpoint=endpoint)
+            try:
+                # Shielded so a waiter being cancelled doesn't cancel the request
+                # for everyone else.
+                return await asyncio.shield(asyncio.wrap_future(joined))
+            except asyncio.CancelledError:
+                if not joined.cancelled():
+                    raise
+            # The caller that sent the request was cancelled; send it again.
+            return await BaseAPI._get_async(url, params, use_cache, refresh)
+
+        try:
+            result = await BaseAPI._send_async(url, params, cache, endpoint)
+        except asyncio.CancelledError:
+            BaseAPI._end_flight(key)
+            flight.cancel()
+            raise
+        except BaseException as e:
+            BaseAPI._end_flight(key)
+            flight.set_exception(e)
+            raise
+        BaseAPI._end_flight(key)
+        flight.set_result(result)
+        return result
+
+    @staticmethod
+    def _end_flight(key: str) -> None:
+        # Removed before the result is set, so later callers send a new request.
+        with BaseAPI._flights_lock:
+            BaseAPI._flights.pop(key, None)
 
     @staticmethod
-    async def _get_async(url, params: Any) -> Any:
+    async def _send_async(
+        url: str, params: Any, cache: Optional[ResponseCache], endpoint: str
+    ) -> Any:
+        """
+        Sends a request, retrying failures with backoff, and caches a successful
+        response.
+        """
         params["apikey"] = BaseAPI._get_api_key()
-        async with httpx.AsyncClient() as client:
-            response = await client.get(BaseAPI._API_BASE_URL + url, params=params)
-            return response.json()
+        limiter = BaseAPI.get_rate_limiter()
+        for attempt in range(BaseAPI._MAX_RETRIES + 1):
+            await limiter.acquire()
+            start = time.monotonic()
+            response: Optional[httpx.Response] = None
+            latency: Optional[float] = None
+            throttled = False
+            try:
+                response = await BaseAPI._get_client().get(
+                    BaseAPI._get_base_url() + url, params=params
+                )
+                latency = time.monotonic() - start
+                throttled = BaseAPI._is_throttled(
+                    response.status_code, response.content
+                )
+                BaseAPI._record_request(
+                    endpoint, str(response.status_code), start, len(response.content)
+                )
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+                retry_after = None
+                BaseAPI._record_request(endpoint, type(e).__name__, start, 0)
+            finally:
+                limiter.release(latency, throttled)
+
+            if response is not None:
+                if not BaseAPI._is_retryable(response.status_code, response.content):
+                    result = Decoding.loads(response.content)
+                    if cache is not None and response.is_success:
+                        cache.set(url, params, result)
+                    return result
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt < BaseAPI._MAX_RETRIES:
+                Metrics.increment("fmp_retries_total", endpoint=endpoint)
+                await asyncio.sleep(BaseAPI._get_backoff(attempt, retry_after))
+
+        raise APIError(f"GET {url} failed after {attempt + 1} attempts: {error}")
+
+    @staticmethod
+    async def _get_batch_async(
+        url: str, symbols: list[str], refresh: bool = False
+    ) -> dict[str, dict]:
+        """
+        Fetches several symbols from an endpoint that accepts a comma-separated
+        symbol list, returning one record per symbol.
+
+        Each record is cached as if it had been requested on its own, so single
+        and batched lookups share cache entries. With refresh set, every symbol
+        is fetched and its cache entry replaced.
+        """
+        cache = BaseAPI.get_cache()
+        results: dict[str, dict] = {}
+        missing = []
+        for symbol in symbols:
+            cached = (
+                cache.get(url + symbol, {})
+                if cache is not None and not refresh
+                else None
+            )
+            if cached:
+                results[symbol] = cached[0]
+            else:
+                missing.append(symbol)
+        if cache is not None and not refresh:
+            endpoint = BaseAPI._get_endpoint(url)
+            hits = len(symbols) - len(missing)
+            Metrics.increment("fmp_cache_hits_total", hits, endpoint=endpoint)
+            Metrics.increment("fmp_cache_misses_total", len(missing), endpoint=endpoint)
+
+        if missing:
+            response = await BaseAPI._get_async(
+                url + ",".join(missing), {}, use_cache=False
+            )
+            if not isinstance(response, list):
+                raise APIError(f"GET {url} returned an error: {response}")
+            # FMP returns upper-case symbols regardless of how they were requested.
+            requested = {symbol.upper(): symbol for symbol in missing}
+            for record in response:
+                symbol = requested.get(record["symbol"].upper(), record["symbol"])
+                results[symbol] = record
+                if cache is not None:
+                    cache.set(url + symbol, {}, [record])
+
+        return results
+
+    @staticmethod
+    def _get_endpoint(url: str) -> str:
+        """
+        Returns the URL with the symbol removed from /v3 paths, so every symbol
+        requested from an endpoint shares its metrics.
+        """
+        parts = url.split("/")
+        if len(parts) > 3 and parts[1] == "v3":
+            return "/".join(parts[:3])
+        return url
+
+    @staticmethod
+    def _record_request(endpoint: str, status: str, start: float, size: int) -> None:
+        if not Metrics.enabled:
+            return
+        Metrics.increment("fmp_requests_total", endpoint=endpoint, status=status)
+        Metrics.increment("fmp_response_bytes_total", size, endpoint=endpoint)
+        Metrics.observe(
+            "fmp_request_seconds", time.monotonic() - start, endpoint=endpoint
+        )
+
+    @staticmethod
+    def _is_throttled(status_code: int, content: bytes) -> bool:
+        """
+        FMP reports exhausted quotas with a 429 or with a "Limit Reach" error body.
+        """
+        return status_code == 429 or b"Limit Reach" in content[:200]
+
+    @staticmethod
+    def _is_retryable(status_code: int, content: bytes) -> bool:
+        return status_code in BaseAPI._RETRYABLE_STATUSES or BaseAPI._is_throttled(
+            status_code, content
+        )
+
+    @staticmethod
+    def _get_backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Returns the delay before the next attempt, using exponential backoff with
+        full jitter unless the server asked for a specific delay, which is capped
+        at _RETRY_AFTER_CAP.
+        """
+        if retry_after is not None and retry_after.isdigit():
+            return min(float(retry_after), BaseAPI._RETRY_AFTER_CAP)
+        ceiling = min(BaseAPI._BACKOFF_CAP, BaseAPI._BACKOFF_BASE * 2**attempt)
+        return random.uniform(0, ceiling)
 
     @staticmethod
     def _get_api_key() -> str:
         return os.environ["FMP_API_KEY"]
+
+    @staticmethod
+    def _get_base_url() -> str:
+        return os.environ.get("FMP_BASE_URL", BaseAPI._DEFAULT_API_BASE_URL)
+
+    @staticmethod
+    def get_cache() -> Optional[ResponseCache]:
+        """
+        Returns the shared response cache, or None if FMP_CACHE_DISABLED is set.
+        """
+        if os.environ.get("FMP_CACHE_DISABLED"):
+            return None
+        if BaseAPI._cache is None:
+            BaseAPI._cache = ResponseCache()
+        return BaseAPI._cache
+
+    @staticmethod
+    def get_rate_limiter() -> RateLimiter:
+        """
+        Returns the process-wide rate limiter, creating it on first use.
+        """
+        if BaseAPI._rate_limiter is None:
+            BaseAPI._rate_limiter = RateLimiter(
+                requests_per_minute=BaseAPI._REQUESTS_PER_MINUTE,
+                burst=BaseAPI._BURST,
+                max_concurrency=BaseAPI._MAX_CONCURRENCY,
+                target_latency=BaseAPI._TARGET_LATENCY,
+            )
+        return BaseAPI._rate_limiter
+
+    @staticmethod
+    def configure_rate_limit(
+        requests_per_minute: Optional[int] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        target_latency: Optional[float] = None,
+    ) -> None:
+        """
+        Overrides the rate limit settings and replaces the current limiter.
+        """
+        if requests_per_minute is not None:
+            BaseAPI._REQUESTS_PER_MINUTE = requests_per_minute
+        if burst is not None:
+            BaseAPI._BURST = burst
+        if max_concurrency is not None:
+            BaseAPI._MAX_CONCURRENCY = max_concurrency
+        if target_latency is not None:
+            BaseAPI._TARGET_LATENCY = target_latency
+        BaseAPI._rate_limiter = None
+
+    @staticmethod
+    def configure_client(
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Overrides the connection pool settings. Only clients created after this
+        call are affected, so it should be called before the first request.
+        """
+        if max_connections is not None:
+            BaseAPI._MAX_CONNECTIONS = max_connections
+        if max_keepalive_connections is not None:
+            BaseAPI._MAX_KEEPALIVE_CONNECTIONS = max_keepalive_connections
+        if keepalive_expiry is not None:
+            BaseAPI._KEEPALIVE_EXPIRY = keepalive_expiry
+        if connect_timeout is not None:
+            BaseAPI._CONNECT_TIMEOUT = connect_timeout
+        if read_timeout is not None:
+            BaseAPI._READ_TIMEOUT = read_timeout
+
+    @staticmethod
+    def _get_client() -> httpx.AsyncClient:
+        """
+        Returns the running loop's async client, creating it on first use.
+        """
+        loop = asyncio.get_running_loop()
+        with BaseAPI._clients_lock:
+            client = BaseAPI._clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    http2=importlib.util.find_spec("h2") is not None,
+                    limits=httpx.Limits(
+                        max_connections=BaseAPI._MAX_CONNECTIONS,
+                        max_keepalive_connections=BaseAPI._MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=BaseAPI._KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=httpx.Timeout(
+                        BaseAPI._READ_TIMEOUT, connect=BaseAPI._CONNECT_TIMEOUT
+                    ),
+                )
+                BaseAPI._clients[loop] = client
+        return client
+
+    @staticmethod
+    def add_close_callback(callback: Callable[[], Awaitable[None]]) -> None:
+        """
+        Registers a coroutine function to await whenever a loop's async client
+        is closed, so other clients bound to the event loop are closed with it.
+        """
+        if callback not in BaseAPI._close_callbacks:
+            BaseAPI._close_callbacks.append(callback)
+
+    @staticmethod
+    async def aclose() -> None:
+        """
+        Closes the running loop's async client and its pooled connections, then
+        runs the registered close callbacks. Clients on other loops are untouched.
+        """
+        with BaseAPI._clients_lock:
+            client = BaseAPI._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+        for callback in BaseAPI._close_callbacks:
+            await callback()
+
+    @staticmethod
+    def run(coro: Coroutine[Any, Any, T], debug: Optional[bool] = None) -> T:
+        """
+        Runs a coroutine in a new event loop and closes its async clients
+        before the loop shuts down. Use this in place of asyncio.run.
+
+        :param debug: Run the loop in debug mode, which logs (to the "asyncio"
+            logger) every callback that blocks it for longer than
+            ASYNC_SLOW_CALLBACK seconds. Defaults to whether ASYNC_DEBUG is set.
+        """
+        if debug is None:
+            debug = bool(os.environ.get("ASYNC_DEBUG"))
+
+        async def _run() -> T:
+            if debug:
+                loop = asyncio.get_running_loop()
+                loop.slow_callback_duration = BaseAPI._SLOW_CALLBACK_DURATION
+            try:
+                return await coro
+            finally:
+                await BaseAPI.aclose()
+
+        return asyncio.run(_run(), debug=debug)
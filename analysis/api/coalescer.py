@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Optional
+
+from analysis.api.base_api import APIError
+
+
+class _LoopState:
+    def __init__(self) -> None:
+        self.pending: dict[str, list[asyncio.Future]] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.tasks: set[asyncio.Task] = set()
+
+
+class BatchCoalescer:
+    """
+    Collects concurrent single-key requests made within a short window and
+    resolves them with one batched call.
+
+    Every caller awaiting the same key receives the same result. If the batched
+    call fails, the error is raised to every caller in the batch.
+    """
+
+    def __init__(
+        self,
+        fetch_batch: Callable[[list[str]], Awaitable[dict[str, Any]]],
+        window: float = 0.005,
+        max_batch: int = 50,
+    ) -> None:
+        """
+        :param fetch_batch: Fetches a list of keys and returns the results by key
+        :param window: Seconds to wait for more keys before sending a batch
+        :param max_batch: Maximum number of keys in a single batch
+        """
+        self.fetch_batch = fetch_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = 0
+        self.batches = 0
+        self._states: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, _LoopState
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Any:
+        """
+        Returns the result for a single key once its batch has been fetched.
+        """
+        loop = asyncio.get_running_loop()
+        state = self._get_state(loop)
+        future = loop.create_future()
+        state.pending.setdefault(key, []).append(future)
+        self.requests += 1
+
+        if len(state.pending) >= self.max_batch:
+            self._flush(loop, state)
+        elif state.timer is None:
+            state.timer = loop.call_later(self.window, self._flush, loop, state)
+
+        return await future
+
+    def _get_state(self, loop: asyncio.AbstractEventLoop) -> _LoopState:
+        # Futures belong to the loop that created them, so pending requests are
+        # tracked separately for each running loop.
+        with self._lock:
+            state = self._states.get(loop)
+            if state is None:
+                state = _LoopState()
+                self._states[loop] = state
+            return state
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, state: _LoopState) -> None:
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+
+        batch, state.pending = state.pending, {}
+        if not batch:
+            return
+
+        self.batches += 1
+        task = loop.create_task(self._dispatch(batch))
+        state.tasks.add(task)
+        task.add_done_callback(state.tasks.discard)
+
+    async def _dispatch(self, batch: dict[str, list[asyncio.Future]]) -> None:
+        try:
+            results = await self.fetch_batch(list(batch))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in batch.items():
+            for future in futures:
+                if future.done():
+                    continue
+                if key in results:
+                    future.set_result(results[key])
+                else:
+                    future.set_exception(APIError(f"No result returned for {key}"))
+
+    def stats(self) -> dict:
+        """
+        Returns the number of single-key requests and the batches they became.
+        """
+        return {"requests": self.requests, "batches": self.batches}
@@ -1,128 +1,210 @@
-import fmpsdk  # type: ignore
+import logging
+from typing import Iterable, Optional
+
 import pandas as pd
 
-from analysis.api.base_api import BaseAPI
+from analysis.api.base_api import APIError, BaseAPI
+from analysis.api.coalescer import BatchCoalescer
+from analysis.api.decoding import Decoding
+
+logger = logging.getLogger(__name__)
 
 
 class CompanyAPI(BaseAPI):
+    # Concurrent quote and profile requests are sent as one multi-symbol call.
+    _quote_coalescer = BatchCoalescer(
+        lambda symbols: BaseAPI._get_batch_async("/v3/quote/", symbols)
+    )
+    _profile_coalescer = BatchCoalescer(
+        lambda symbols: BaseAPI._get_batch_async("/v3/profile/", symbols)
+    )
+
     @staticmethod
-    async def get_company_profile(symbol: str) -> dict:
+    async def get_company_profile(symbol: str, refresh: bool = False) -> dict:
         """
         API call to retrieve company profile.
         """
-        url = f"/v3/profile/{symbol}"
-        profile = await BaseAPI._get_async(url, {})
-        return profile[0]
+        if refresh:
+            return await CompanyAPI._get_record("/v3/profile/", symbol)
+        return await CompanyAPI._profile_coalescer.get(symbol)
+
+    @staticmethod
+    async def _get_record(url: str, symbol: str) -> dict:
+        # Refreshed records are fetched on their own rather than in a batch, which
+        # may already have been answered from the cache.
+        records = await BaseAPI._get_batch_async(url, [symbol], refresh=True)
+        if symbol not in records:
+            raise APIError(f"No result returned for {symbol}")
+        return records[symbol]
 
     @staticmethod
-    async def get_daily_chart(symbol: str) -> pd.DataFrame:
+    async def get_daily_chart(
+        symbol: str,
+        timeseries: Optional[int] = None,
+        from_date: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
+        use_cache: bool = True,
+        refresh: bool = False,
+    ) -> pd.DataFrame:
         """
-        API call to retrieve daily close price.
+        API call to retrieve daily close price. If timeseries is provided, only
+        that many of the most recent days are returned. If from_date (YYYY-MM-DD)
+        is provided, only days on or after it are returned. If columns are
+        provided, only those are kept. Pass use_cache=False to bypass the
+        response cache, or refresh=True to replace the cached response.
         """
         url = f"/v3/historical-price-full/{symbol}"
-        daily_chart = await BaseAPI._get_async(url, {})
-        print(daily_chart.keys())
-        return pd.DataFrame(daily_chart["historical"])
+        params: dict = {}
+        if timeseries:
+            params["timeseries"] = timeseries
+        if from_date:
+            params["from"] = from_date
+        daily_chart = await BaseAPI._get_async(
+            url, params, use_cache=use_cache, refresh=refresh
+        )
+        logger.debug("Daily chart for %s has keys %s", symbol, list(daily_chart))
+        return Decoding.to_frame(daily_chart.get("historical", []), columns)
 
     @staticmethod
-    async def get_daily_shares(symbol: str) -> pd.DataFrame:
+    async def get_daily_shares(
+        symbol: str, columns: Optional[Iterable[str]] = None, refresh: bool = False
+    ) -> pd.DataFrame:
         """
-        API call to retrieve daily outstanding shares.
+        API call to retrieve daily outstanding shares, keeping only the given
+        columns if any are provided.
         """
         url = "/v4/historical/shares_float"
         params = {"symbol": symbol}
-        daily_shares = await BaseAPI._get_async(url, params)
-        return pd.DataFrame(daily_shares)
+        daily_shares = await BaseAPI._get_async(url, params, refresh=refresh)
+        return Decoding.to_frame(daily_shares, columns)
 
     @staticmethod
-    async def get_full_quote(symbol: str) -> dict:
+    async def get_full_quote(symbol: str, refresh: bool = False) -> dict:
         """
         API call to retrieve full quote.
         """
-        url = f"/v3/quote/{symbol}"
-        quote = await BaseAPI._get_async(url, {})
-        return quote[0]
+        if refresh:
+            return await CompanyAPI._get_record("/v3/quote/", symbol)
+        return await CompanyAPI._quote_coalescer.get(symbol)
 
     @staticmethod
-    def get_employee_history(symbol: str) -> pd.DataFrame:
+    async def get_employee_history(symbol: str) -> pd.DataFrame:
         """
         API call to retrieve employee count history.
         """
         url = "/v4/historical/employee_count"
         params = {"symbol": symbol}
-        employees = BaseAPI._get_request(url, params)
-        return pd.DataFrame.from_dict(employees)
+        employees = await BaseAPI._get_async(url, params)
+        return Decoding.to_frame(employees)
 
     @staticmethod
     async def get_balance_sheet_statements(
-        symbol: str, period: str = "quarter"
+        symbol: str,
+        period: str = "quarter",
+        limit: Optional[int] = 16,
+        columns: Optional[Iterable[str]] = None,
+        use_cache: bool = True,
+        refresh: bool = False,
     ) -> pd.DataFrame:
         """
-        API call to retrieve balance sheet statements.
+        API call to retrieve balance sheet statements, most recent first.
         """
         url = f"/v3/balance-sheet-statement/{symbol}"
-        params = {"period": period}
-        balance_sheet_statements = await BaseAPI._get_async(url, params)
-        return pd.DataFrame(balance_sheet_statements[:16])
+        params: dict = {"period": period}
+        if limit:
+            params["limit"] = limit
+        balance_sheet_statements = await BaseAPI._get_async(
+            url, params, use_cache=use_cache, refresh=refresh
+        )
+        return Decoding.to_frame(balance_sheet_statements[:limit], columns)
 
     @staticmethod
     async def get_income_statements(
-        symbol: str, period: str = "quarter"
+        symbol: str,
+        period: str = "quarter",
+        limit: Optional[int] = 16,
+        columns: Optional[Iterable[str]] = None,
+        use_cache: bool = True,
+        refresh: bool = False,
     ) -> pd.DataFrame:
         """
-        API call to retrieve income statements.
+        API call to retrieve income statements, most recent first.
         """
         url = f"/v3/income-statement/{symbol}"
-        params = {"period": period}
-        income_statements = await BaseAPI._get_async(url, params)
-        return pd.DataFrame(income_statements[:16])
+        params: dict = {"period": period}
+        if limit:
+            params["limit"] = limit
+        income_statements = await BaseAPI._get_async(
+            url, params, use_cache=use_cache, refresh=refresh
+        )
+        return Decoding.to_frame(income_statements[:limit], columns)
 
     @staticmethod
     async def get_cash_flow_statements(
-        symbol: str, period: str = "quarter"
+        symbol: str,
+        period: str = "quarter",
+        limit: Optional[int] = 16,
+        columns: Optional[Iterable[str]] = None,
+        use_cache: bool = True,
+        refresh: bool = False,
     ) -> pd.DataFrame:
         """
-        API call to retrieve cashflow statements.
+        API call to retrieve cashflow statements, most recent first.
         """
         url = f"/v3/cash-flow-statement/{symbol}"
-        params = {"period": period}
-        cash_flow_statements = await BaseAPI._get_async(url, params)
-        return pd.DataFrame(cash_flow_statements[:16])
+        params: dict = {"period": period}
+        if limit:
+            params["limit"] = limit
+        cash_flow_statements = await BaseAPI._get_async(
+            url, params, use_cache=use_cache, refresh=refresh
+        )
+        return Decoding.to_frame(cash_flow_statements[:limit], columns)
 
     @staticmethod
-    async def get_ratios(symbol: str, period: str = "quarter") -> pd.DataFrame:
+    async def get_ratios(
+        symbol: str,
+        period: str = "quarter",
+        columns: Optional[Iterable[str]] = None,
+        refresh: bool = False,
+    ) -> pd.DataFrame:
         """
-        API call to retrieve ratios.
+        API call to retrieve ratios, keeping only the given columns if any are
+        provided.
         """
         url = f"/v3/ratios/{symbol}"
         params = {"period": period}
-        ratios = await BaseAPI._get_async(url, params)
-        return pd.DataFrame(ratios)
+        ratios = await BaseAPI._get_async(url, params, refresh=refresh)
+        return Decoding.to_frame(ratios, columns)
 
     @staticmethod
     async def get_key_metrics(symbol: str) -> pd.DataFrame:
         """
         API call to retrieve key metrics.
         """
-        key_metrics = fmpsdk.key_metrics(
-            apikey=BaseAPI._get_api_key(), symbol=symbol, period="quarter"
-        )
-        return pd.DataFrame(key_metrics)
+        url = f"/v3/key-metrics/{symbol}"
+        params = {"period": "quarter"}
+        key_metrics = await BaseAPI._get_async(url, params)
+        return Decoding.to_frame(key_metrics)
 
     @staticmethod
-    def get_news(symbol: str) -> pd.DataFrame:
+    async def get_news(symbol: str, limit: int = 50) -> pd.DataFrame:
         """
         API call to news pertaining to a particular stock.
         """
-        response = fmpsdk.stock_news(apikey=BaseAPI._get_api_key(), tickers=symbol)
-        return pd.DataFrame(response)
+        url = "/v3/stock_news"
+        params = {"tickers": symbol, "limit": limit}
+        news = await BaseAPI._get_async(url, params)
+        return Decoding.to_frame(news)
 
     @staticmethod
-    async def get_analyst_estimates(symbol: str) -> pd.DataFrame:
+    async def get_analyst_estimates(
+        symbol: str, columns: Optional[Iterable[str]] = None, refresh: bool = False
+    ) -> pd.DataFrame:
         """
-        API call to retrieve analyst estimates.
+        API call to retrieve analyst estimates, keeping only the given columns if
+        any are provided.
         """
         url = f"/v3/analyst-estimates/{symbol}"
         params = {"period": "quarter"}
-        ratios = await BaseAPI._get_async(url, params)
-        return pd.DataFrame(ratios)
+        ratios = await BaseAPI._get_async(url, params, refresh=refresh)
+        return Decoding.to_frame(ratios, columns)
@@ -0,0 +1,104 @@
+import importlib.util
+import json
+import operator
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+_HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+if _HAS_ORJSON:
+    import orjson
+
+
+class Decoding:
+    """
+    Decodes API responses with orjson when it is installed, and builds DataFrames
+    from them column by column.
+    """
+
+    # Array kind numpy should produce for columns holding only these types of
+    # values. Any other kind, e.g. floats for integers too large for int64,
+    # differs from what pandas would produce.
+    _NUMERIC_KINDS = {
+        frozenset({int}): "i",
+        frozenset({float}): "f",
+        frozenset({int, float}): "f",
+        frozenset({bool}): "b",
+    }
+
+    @staticmethod
+    def loads(content: bytes | str) -> Any:
+        """
+        Parses a JSON document.
+        """
+        if _HAS_ORJSON:
+            return orjson.loads(content)
+        return json.loads(content)
+
+    @staticmethod
+    def dumps(value: Any) -> str:
+        """
+        Serializes a value parsed by Decoding.loads back to JSON.
+        """
+        if _HAS_ORJSON:
+            return orjson.dumps(value).decode()
+        return json.dumps(value)
+
+    @staticmethod
+    def to_frame(
+        records: list[dict], columns: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Builds the same DataFrame as pd.DataFrame(records), restricted to the
+        given columns, without going through pandas' row-wise conversion.
+
+        Each column is gathered into a tuple and converted to an array on its
+        own: numbers and booleans through numpy, strings as objects, and
+        anything else, including columns mixing types, through pandas' type
+        inference.
+
+        :param records: Records sharing the keys of the first one
+        :param columns: Columns to keep, defaults to every key of the first
+            record. Columns missing from the first record are left out.
+        """
+        if not isinstance(records, list):
+            # Error responses are dicts; keep pandas' handling of them.
+            return pd.DataFrame(records)
+        if not records:
+            return pd.DataFrame()
+        first = records[0]
+        if columns is None:
+            columns = list(first)
+        else:
+            columns = [column for column in columns if column in first]
+        if not columns:
+            return pd.DataFrame(index=pd.RangeIndex(len(records)))
+
+        getter = operator.itemgetter(*columns)
+        try:
+            rows = map(getter, records)
+            values = list(zip(*rows)) if len(columns) > 1 else [tuple(rows)]
+        except KeyError:
+            # Some records lack a key; fill it with None as pandas would.
+            values = [
+                tuple(record.get(column) for record in records) for column in columns
+            ]
+
+        data = {}
+        for column, column_values in zip(columns, values):
+            types = frozenset(map(type, column_values))
+            array: Optional[np.ndarray] = None
+            if types == {str}:
+                array = np.array(column_values, dtype=object)
+            elif types in Decoding._NUMERIC_KINDS:
+                array = np.array(column_values)
+                if array.dtype.kind != Decoding._NUMERIC_KINDS[types]:
+                    array = None
+            if array is None:
+                # e.g. numbers mixed with None, which pandas turns into NaN,
+                # numbers mixed with strings or booleans, which numpy would
+                # convert to one or the other, or nested lists.
+                array = pd.Series(column_values).to_numpy()
+            data[column] = array
+        return pd.DataFrame(data, copy=False)
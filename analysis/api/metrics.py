@@ -0,0 +1,264 @@
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Metrics:
+    """
+    Process-wide counters, latency histograms and timing spans, exported as
+    Prometheus text or JSON.
+
+    Collection is off unless METRICS_ENABLED is set or Metrics.enable is called.
+    While off, every recording call returns after checking a single flag.
+    """
+
+    # Upper bounds in seconds of the latency histogram buckets.
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    enabled = bool(os.environ.get("METRICS_ENABLED"))
+
+    _lock = threading.Lock()
+    _counters: dict[tuple[str, Labels], float] = {}
+    # Per histogram: a count per bucket plus one for +Inf, then the sum.
+    _histograms: dict[tuple[str, Labels], list[float]] = {}
+    _server: Optional[ThreadingHTTPServer] = None
+
+    # Spans recorded while a trace is active in the current context.
+    _trace: ContextVar[Optional[list[dict]]] = ContextVar("trace", default=None)
+    _noop = contextlib.nullcontext()
+
+    @staticmethod
+    def enable(enabled: bool = True) -> None:
+        """
+        Turns collection on or off. Metrics already collected are kept.
+        """
+        Metrics.enabled = enabled
+
+    @staticmethod
+    def increment(name: str, value: float = 1, **labels: str) -> None:
+        """
+        Adds to a counter.
+        """
+        if not Metrics.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with Metrics._lock:
+            Metrics._counters[key] = Metrics._counters.get(key, 0) + value
+
+    @staticmethod
+    def observe(name: str, seconds: float, **labels: str) -> None:
+        """
+        Records a duration in a histogram.
+        """
+        if not Metrics.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with Metrics._lock:
+            histogram = Metrics._histograms.get(key)
+            if histogram is None:
+                histogram = Metrics._histograms[key] = [0.0] * (
+                    len(Metrics.BUCKETS) + 2
+                )
+            idx = 0
+            while idx < len(Metrics.BUCKETS) and seconds > Metrics.BUCKETS[idx]:
+                idx += 1
+            histogram[idx] += 1
+            histogram[-1] += seconds
+
+    @staticmethod
+    def span(name: str, **labels: str) -> contextlib.AbstractContextManager:
+        """
+        Times a block into the span_seconds histogram, and into the active trace
+        if there is one.
+        """
+        if not Metrics.enabled:
+            return Metrics._noop
+        return Metrics._span(name, labels)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _span(name: str, labels: dict[str, str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            Metrics.observe("span_seconds", seconds, span=name, **labels)
+            trace = Metrics._trace.get()
+            if trace is not None:
+                trace.append(
+                    {"span": name, **labels, "start": start, "seconds": seconds}
+                )
+
+    @staticmethod
+    def timed(name: str) -> Callable[[F], F]:
+        """
+        Decorates a function or coroutine function so each call is timed as a
+        span.
+        """
+
+        def decorator(func: F) -> F:
+            if asyncio.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not Metrics.enabled:
+                        return await func(*args, **kwargs)
+                    with Metrics._span(name, {}):
+                        return await func(*args, **kwargs)
+
+                return async_wrapper  # type: ignore
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not Metrics.enabled:
+                    return func(*args, **kwargs)
+                with Metrics._span(name, {}):
+                    return func(*args, **kwargs)
+
+            return wrapper  # type: ignore
+
+        return decorator
+
+    @staticmethod
+    @contextlib.contextmanager
+    def trace() -> Iterator[list[dict]]:
+        """
+        Collects the spans recorded in the current context, including tasks and
+        threads started from it, into the yielded list. Each span is a dict with
+        its name, labels, start (in time.perf_counter seconds) and duration.
+        """
+        spans: list[dict] = []
+        token = Metrics._trace.set(spans)
+        try:
+            yield spans
+        finally:
+            Metrics._trace.reset(token)
+
+    @staticmethod
+    def reset() -> None:
+        """
+        Discards every collected metric.
+        """
+        with Metrics._lock:
+            Metrics._counters.clear()
+            Metrics._histograms.clear()
+
+    @staticmethod
+    def to_json() -> dict:
+        """
+        Returns every counter, and every histogram with its count, sum and
+        cumulative bucket counts, ordered by name and labels.
+        """
+        with Metrics._lock:
+            counters = sorted(Metrics._counters.items())
+            histograms = sorted(
+                (key, list(value)) for key, value in Metrics._histograms.items()
+            )
+
+        result: dict[str, list[dict]] = {"counters": [], "histograms": []}
+        for (name, labels), value in counters:
+            result["counters"].append(
+                {"name": name, "labels": dict(labels), "value": value}
+            )
+        for (name, labels), histogram in histograms:
+            cumulative, buckets = 0.0, {}
+            for bound, count in zip((*Metrics.BUCKETS, "+Inf"), histogram[:-1]):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            result["histograms"].append(
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": cumulative,
+                    "sum": histogram[-1],
+                    "buckets": buckets,
+                }
+            )
+        return result
+
+    @staticmethod
+    def to_prometheus() -> str:
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        metrics = Metrics.to_json()
+        lines = []
+        typed: set[str] = set()
+        for counter in metrics["counters"]:
+            if counter["name"] not in typed:
+                lines.append(f"# TYPE {counter['name']} counter")
+                typed.add(counter["name"])
+            labels = Metrics._format_labels(counter["labels"])
+            lines.append(f"{counter['name']}{labels} {counter['value']}")
+        for histogram in metrics["histograms"]:
+            name = histogram["name"]
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, count in histogram["buckets"].items():
+                labels = Metrics._format_labels({**histogram["labels"], "le": bound})
+                lines.append(f"{name}_bucket{labels} {count}")
+            labels = Metrics._format_labels(histogram["labels"])
+            lines.append(f"{name}_sum{labels} {histogram['sum']}")
+            lines.append(f"{name}_count{labels} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _format_labels(labels: dict[str, Any]) -> str:
+        if not labels:
+            return ""
+        pairs = []
+        for key, value in labels.items():
+            escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            pairs.append(f'{key}="{escaped}"')
+        return "{" + ",".join(pairs) + "}"
+
+    @staticmethod
+    def serve(port: int, host: str = "127.0.0.1") -> None:
+        """
+        Serves /metrics as Prometheus text and /metrics.json as JSON from a
+        background thread. Calls after the first are ignored, so this is safe to
+        call on every Streamlit rerun.
+        """
+        with Metrics._lock:
+            if Metrics._server is not None:
+                return
+            Metrics._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(
+            target=Metrics._server.serve_forever, name="metrics", daemon=True
+        ).start()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            body = Metrics.to_prometheus().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif path == "/metrics.json":
+            body = json.dumps(Metrics.to_json()).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Scrapes would otherwise be written to stderr.
+        pass
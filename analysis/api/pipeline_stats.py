@@ -0,0 +1,83 @@
+import time
+from typing import Optional
+
+
+class PipelineStats:
+    """
+    Tracks throughput and per-symbol latency of a streaming screener run.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.completed = 0
+        self.rejected = 0
+        self.latencies: list[float] = []
+        self.errors: dict[str, str] = {}
+
+    def record(self, latency: float) -> None:
+        """
+        Records a finished symbol.
+        """
+        self.completed += 1
+        self.latencies.append(latency)
+
+    def record_rejected(self, latency: float) -> None:
+        """
+        Records a symbol that was filtered out.
+        """
+        self.record(latency)
+        self.rejected += 1
+
+    def record_error(self, symbol: str, latency: float, error: BaseException) -> None:
+        """
+        Records a symbol that could not be loaded.
+        """
+        self.record(latency)
+        self.errors[symbol] = f"{type(error).__name__}: {error}"
+
+    def finish(self) -> None:
+        """
+        Marks the end of the run.
+        """
+        self.finished_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Returns the seconds since the run started, or its duration once finished.
+        """
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """
+        Returns the number of symbols completed per second.
+        """
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the given percentile of per-symbol latency in seconds.
+        """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        idx = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+        return ordered[idx]
+
+    def summary(self) -> dict:
+        """
+        Returns the throughput and tail latency figures used for tuning.
+        """
+        return {
+            "symbols": self.completed,
+            "rejected": self.rejected,
+            "failed": len(self.errors),
+            "elapsed": round(self.elapsed, 2),
+            "symbols_per_sec": round(self.throughput, 2),
+            "p50": round(self.percentile(50), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+        }
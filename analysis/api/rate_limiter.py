@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Limits the request rate to a number of requests per minute, allowing short
+    bursts up to the bucket capacity.
+
+    The bucket is shared by every event loop and thread in the process.
+    """
+
+    def __init__(self, requests_per_minute: int, burst: int) -> None:
+        self.rate = requests_per_minute / 60
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """
+        Takes a token if one is available and returns 0, otherwise returns the
+        number of seconds until the next token is due.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """
+        Waits until a request may be sent.
+        """
+        while (delay := self._take()) > 0:
+            await asyncio.sleep(delay)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Bounds the number of requests in flight across the whole process.
+
+    The limit grows by one after a full window of fast, successful requests and
+    is halved whenever the API throttles us or latency exceeds the target.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 32,
+        target_latency: float = 2.0,
+        cooldown: float = 1.0,
+    ) -> None:
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Waits for a free slot.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                return
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+            if future.done() and not future.cancelled():
+                # _grant handed us a slot before the cancellation was delivered.
+                self.release()
+            # A slot granted after cancellation is handed back by _grant.
+            raise
+
+    def release(self) -> None:
+        """
+        Frees a slot and wakes the next waiter, if any.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self._wake()
+
+    def record(self, latency: float, throttled: bool) -> None:
+        """
+        Adjusts the limit from the outcome of a request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if throttled or latency > self.target_latency:
+                self._successes = 0
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit // 2)
+                    self._last_decrease = now
+                return
+
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self._successes = 0
+                self.limit += 1
+                self._wake()
+
+    def _wake(self) -> None:
+        """
+        Hands free slots to waiters. Must be called with the lock held.
+        """
+        while self._waiters and self.in_flight < self.limit:
+            loop, future = self._waiters.popleft()
+            self.in_flight += 1
+            try:
+                loop.call_soon_threadsafe(self._grant, future)
+            except RuntimeError:
+                # The waiter's loop has already been closed.
+                self.in_flight -= 1
+
+    def _grant(self, future: asyncio.Future) -> None:
+        if future.done():
+            self.release()
+        else:
+            future.set_result(None)
+
+
+class RateLimiter:
+    """
+    Combines the request rate and in-flight limits applied to every API call.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        burst: int,
+        max_concurrency: int,
+        target_latency: float,
+    ) -> None:
+        self.bucket = TokenBucket(requests_per_minute, burst)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial=min(8, max_concurrency),
+            maximum=max_concurrency,
+            target_latency=target_latency,
+        )
+
+    async def acquire(self) -> None:
+        """
+        Waits for an in-flight slot and then for a rate token.
+        """
+        await self.concurrency.acquire()
+        try:
+            await self.bucket.acquire()
+        except BaseException:
+            self.concurrency.release()
+            raise
+
+    def release(self, latency: Optional[float], throttled: bool) -> None:
+        """
+        Frees the in-flight slot, feeding the request outcome back into the limit.
+        Pass a latency of None when the request failed before a response.
+        """
+        if latency is not None or throttled:
+            self.concurrency.record(latency or 0.0, throttled)
+        self.concurrency.release()
@@ -0,0 +1,229 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+from analysis.api.decoding import Decoding
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+
+class ResponseCache:
+    """
+    On-disk cache of API responses keyed by URL and parameters.
+
+    Each endpoint has its own freshness policy, and the least recently used
+    responses are evicted once the cache grows beyond its size limit.
+    """
+
+    _DEFAULT_PATH = os.path.join(".cache", "fmp_responses.sqlite")
+    _DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    # Access times of hits are buffered and written in one transaction once
+    # this many have accumulated, or before the next write or eviction.
+    _ACCESS_BATCH_SIZE = 100
+
+    # Time-to-live in seconds by URL prefix. The first matching prefix wins and
+    # endpoints without a policy are never cached.
+    TTL_POLICIES: list[tuple[str, int]] = [
+        ("/v3/quote/", 15),
+        ("/v3/stock_news", 15 * MINUTE),
+        ("/v3/stock-screener", HOUR),
+        ("/v3/profile/", DAY),
+        ("/v3/historical-price-full/", DAY),
+        ("/v4/historical/shares_float", DAY),
+        ("/v3/analyst-estimates/", DAY),
+        ("/v3/ratios/", WEEK),
+        ("/v3/key-metrics/", WEEK),
+        ("/v4/historical/employee_count", WEEK),
+        ("/v3/balance-sheet-statement/", 2 * WEEK),
+        ("/v3/income-statement/", 2 * WEEK),
+        ("/v3/cash-flow-statement/", 2 * WEEK),
+    ]
+
+    _EXCLUDED_PARAMS = {"apikey"}
+
+    def __init__(
+        self, path: Optional[str] = None, max_bytes: int = _DEFAULT_MAX_BYTES
+    ) -> None:
+        self.path = path or os.environ.get("FMP_CACHE_PATH") or self._DEFAULT_PATH
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._accessed: dict[str, float] = {}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self._conn.commit()
+        # Kept up to date on every write, so that only eviction has to scan.
+        (self._size,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+    @classmethod
+    def get_ttl(cls, url: str) -> int:
+        """
+        Returns the time-to-live in seconds for an endpoint, or 0 if it is not cached.
+        """
+        for prefix, ttl in cls.TTL_POLICIES:
+            if url.startswith(prefix):
+                return ttl
+        return 0
+
+    @classmethod
+    def get_key(cls, url: str, params: dict) -> str:
+        """
+        Builds the cache key for a request, ignoring the API key.
+        """
+        filtered = sorted(
+            (key, value)
+            for key, value in params.items()
+            if key not in cls._EXCLUDED_PARAMS and value is not None
+        )
+        return url + "?" + urlencode(filtered)
+
+    def get(self, url: str, params: dict) -> Optional[Any]:
+        """
+        Returns a fresh cached response, or None if there isn't one.
+        """
+        if not self.get_ttl(url):
+            return None
+
+        key = self.get_key(url, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+
+            self._accessed[key] = now
+            if len(self._accessed) >= self._ACCESS_BATCH_SIZE:
+                self._flush_accessed()
+                self._conn.commit()
+            self.hits += 1
+
+        return Decoding.loads(row[0])
+
+    def set(self, url: str, params: dict, response: Any) -> None:
+        """
+        Stores a response if its endpoint is cacheable and it isn't an error.
+        """
+        ttl = self.get_ttl(url)
+        if not ttl or (isinstance(response, dict) and "Error Message" in response):
+            return
+
+        key = self.get_key(url, params)
+        body = Decoding.dumps(response)
+        now = time.time()
+        with self._lock:
+            self._flush_accessed()
+            row = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), now + ttl, now),
+            )
+            self._size += len(body) - (row[0] if row else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _flush_accessed(self) -> None:
+        """
+        Writes the buffered access times of cache hits.
+        """
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def _evict(self) -> None:
+        """
+        Removes expired responses, then the least recently used ones until the
+        cache fits within its size limit.
+        """
+        rows = self._conn.execute(
+            "SELECT key, size, expires_at FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        now = time.time()
+        evicted = []
+        excess = self._size - self.max_bytes
+        for key, size, expires_at in rows:
+            if expires_at < now:
+                evicted.append((key,))
+                excess -= size
+        for key, size, expires_at in rows:
+            if excess <= 0:
+                break
+            if expires_at >= now:
+                evicted.append((key,))
+                excess -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._size = self.max_bytes + excess
+
+    def clear(self) -> None:
+        """
+        Removes every cached response and resets the counters.
+        """
+        with self._lock:
+            self._accessed.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters along with the current cache size.
+        """
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            size = self._size
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._flush_accessed()
+            self._conn.commit()
+            self._conn.close()
@@ -1,77 +1,223 @@
 import asyncio
 import datetime
-from typing import Optional
+import functools
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, TypeVar
 
-import fmpsdk  # type: ignore
 import pandas as pd
 
 from analysis.api.base_api import BaseAPI
+from analysis.api.metrics import Metrics
+from analysis.api.pipeline_stats import PipelineStats
+from analysis.api.screener_planner import Predicate, ScreenerPlanner
 from analysis.data.company_data import CompanyData
+from analysis.data.panel_data import PanelData
 from analysis.models.company import Company
 from analysis.utils import format_number
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
 
 class ScreenerAPI(BaseAPI):
+    # Datasets read when building a profile row. Balance sheets, cash flows,
+    # shares float and estimates are never needed, so they aren't fetched.
+    PROFILE_FIELDS = ("income", "daily_chart", "ratios", "quote", "profile")
+
+    # The longest price change in a profile row looks 60 trading days back.
+    PROFILE_CHART_DAYS = 61
+
+    # Exchanges searched by the screener.
+    EXCHANGES = ["NASDAQ", "AMEX", "NYSE"]
+
+    # Number of symbols loaded concurrently by the streaming pipeline.
+    STREAM_CONCURRENCY = 16
+
     @staticmethod
-    async def get_company_profiles(symbols: list[str]):
+    async def get_company_profiles(
+        symbols: Iterable[str],
+        concurrency: int = STREAM_CONCURRENCY,
+        stats: Optional[PipelineStats] = None,
+        refresh: bool = False,
+    ) -> list[dict]:
         """
         Builds a details company profile for a given list of ticker symbols.
+
+        Up to `concurrency` symbols are kept in flight at all times, and metrics
+        for the whole batch are then computed in one vectorized pass. Rows are in
+        completion order and symbols that fail to load are skipped and recorded
+        in `stats`. With refresh set, companies are loaded past the caches.
         """
-        tasks = [Company.load(symbol) for symbol in symbols]
-        profiles: list[Company] = list(await asyncio.gather(*tasks))
-
-        compiled = []
-        for company in profiles:
-            if company.quote["earningsAnnouncement"]:
-                earnings = company.quote["earningsAnnouncement"][:10]
-            else:
-                earnings = "N/A"
-            compiled.append(
-                {
-                    "Symbol": company.profile["symbol"],
-                    "Name": company.profile["companyName"],
-                    "Cap": "$" + format_number(company.profile["mktCap"]),
-                    "IPO Date": company.profile["ipoDate"],
-                    "Employees": company.profile["fullTimeEmployees"],
-                    "1 Week Change": CompanyData.get_daily_change(company, 5),
-                    "1 Month Change": CompanyData.get_daily_change(company, 20),
-                    "3 Month Change": CompanyData.get_daily_change(company, 60),
-                    "Revenue Change": CompanyData.get_last_revenue_change(company),
-                    "Revenue Change (%)": CompanyData.get_last_revenue_percentage_change(
-                        company
-                    ),
-                    "P/E": CompanyData.get_last_ratio_value(
-                        company, "priceEarningsRatio"
-                    ),
-                    "P/B": CompanyData.get_last_ratio_value(
-                        company, "priceToBookRatio"
-                    ),
-                    "Earnings": earnings,
-                }
+        profiles = [
+            company
+            async for company in ScreenerAPI._stream_rows(
+                symbols,
+                functools.partial(ScreenerAPI._load_profile_company, refresh=refresh),
+                concurrency,
+                stats,
             )
+        ]
 
-        return compiled
+        with Metrics.span("screener.panel"):
+            metrics = PanelData(profiles).get_screener_metrics().to_dict("records")
+        return [
+            ScreenerAPI._build_profile_row(company, company_metrics)
+            for company, company_metrics in zip(profiles, metrics)
+        ]
 
     @staticmethod
-    async def populate_profiles(symbols: list[str]):
-        """Builds a dataframe containing the profile of all provided tickers."""
-        if len(symbols) == 0:
-            return pd.DataFrame()
+    def get_profile_row(company: Company) -> dict:
+        """
+        Builds a single screener row from a loaded company.
+        """
+        metrics = {
+            "1 Week Change": CompanyData.get_daily_change(company, 5),
+            "1 Month Change": CompanyData.get_daily_change(company, 20),
+            "3 Month Change": CompanyData.get_daily_change(company, 60),
+            "Revenue Change": CompanyData.get_last_revenue_change(company),
+            "Revenue Change (%)": CompanyData.get_last_revenue_percentage_change(
+                company
+            ),
+            "P/E": CompanyData.get_last_ratio_value(company, "priceEarningsRatio"),
+            "P/B": CompanyData.get_last_ratio_value(company, "priceToBookRatio"),
+        }
+        return ScreenerAPI._build_profile_row(company, metrics)
 
-        responses = []
+    @staticmethod
+    def _build_profile_row(company: Company, metrics: dict) -> dict:
+        if company.quote["earningsAnnouncement"]:
+            earnings = company.quote["earningsAnnouncement"][:10]
+        else:
+            earnings = "N/A"
 
-        window = 10
-        for idx in range(0, len(symbols), window):
-            response = await ScreenerAPI.get_company_profiles(
-                symbols[idx: idx + window]
-            )
-            responses.extend(response)
+        return {
+            "Symbol": company.profile["symbol"],
+            "Name": company.profile["companyName"],
+            "Cap": "$" + format_number(company.profile["mktCap"]),
+            "IPO Date": company.profile["ipoDate"],
+            "Employees": company.profile["fullTimeEmployees"],
+            **metrics,
+            "Earnings": earnings,
+        }
 
-        profiles_df = pd.DataFrame(responses)
-        profiles_df.set_index("Symbol", inplace=True)
+    @staticmethod
+    async def _load_profile_company(symbol: str, refresh: bool = False) -> Company:
+        return await Company.load(
+            symbol,
+            fields=ScreenerAPI.PROFILE_FIELDS,
+            chart_days=ScreenerAPI.PROFILE_CHART_DAYS,
+            compact=True,
+            refresh=refresh,
+        )
+
+    @staticmethod
+    async def _stream_rows(
+        symbols: Iterable[str],
+        load_row: Callable[[str], Awaitable[Optional[T]]],
+        concurrency: int,
+        stats: Optional[PipelineStats],
+    ) -> AsyncIterator[T]:
+        """
+        Runs load_row for each symbol with bounded concurrency and yields the rows
+        in completion order. Symbols for which load_row returns None are rejected.
+        """
+        stats = stats if stats is not None else PipelineStats()
+        remaining = iter(symbols)
+        pending: set[asyncio.Task] = set()
+
+        async def _load(symbol: str) -> tuple[str, float, Optional[T] | Exception]:
+            start = time.monotonic()
+            try:
+                row = await load_row(symbol)
+            except Exception as e:
+                return symbol, time.monotonic() - start, e
+            return symbol, time.monotonic() - start, row
+
+        try:
+            while True:
+                while len(pending) < concurrency:
+                    next_symbol = next(remaining, None)
+                    if next_symbol is None:
+                        break
+                    pending.add(asyncio.create_task(_load(next_symbol)))
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    symbol, latency, result = task.result()
+                    if isinstance(result, Exception):
+                        stats.record_error(symbol, latency, result)
+                    elif result is None:
+                        stats.record_rejected(latency)
+                    else:
+                        stats.record(latency)
+                        yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            # Wait for the cancelled loads to unwind before reporting the run.
+            await asyncio.gather(*pending, return_exceptions=True)
+            stats.finish()
+
+    @staticmethod
+    async def populate_profiles(
+        symbols: list[str] | dict[str, list[str]],
+        stats: Optional[PipelineStats] = None,
+        refresh: bool = False,
+    ):
+        """
+        Builds a dataframe containing the profile of all provided tickers.
+
+        :param symbols: Ticker symbols, or named groups of them. Every group is
+            loaded in a single pass, so symbols in several groups are fetched once.
+        :param stats: Collects per-symbol latencies and failures
+        :param refresh: Load every profile past the caches (see Company.load)
+        :return: A dataframe, or a dataframe per group if groups were given
+        """
+        if not isinstance(symbols, dict):
+            profiles_df = await ScreenerAPI._load_profiles(symbols, stats, refresh)
+            return ScreenerAPI._select_profiles(profiles_df, symbols)
+
+        union = [symbol for group in symbols.values() for symbol in group]
+        profiles_df = await ScreenerAPI._load_profiles(union, stats, refresh)
+        return {
+            name: ScreenerAPI._select_profiles(profiles_df, group)
+            for name, group in symbols.items()
+        }
 
+    @staticmethod
+    async def _load_profiles(
+        symbols: list[str], stats: Optional[PipelineStats], refresh: bool
+    ) -> pd.DataFrame:
+        """
+        Loads the profile of each distinct symbol, indexed by symbol.
+        """
+        unique = list(dict.fromkeys(symbols))
+        responses = (
+            await ScreenerAPI.get_company_profiles(unique, stats=stats, refresh=refresh)
+            if unique
+            else []
+        )
+        profiles_df = pd.DataFrame(responses)
+        if len(responses) > 0:
+            profiles_df.set_index("Symbol", inplace=True)
         return profiles_df
 
+    @staticmethod
+    def _select_profiles(profiles_df: pd.DataFrame, symbols: list[str]) -> pd.DataFrame:
+        if len(profiles_df) == 0:
+            return pd.DataFrame()
+        # Rows stream in completion order; restore the order they were requested in.
+        return profiles_df.reindex(
+            [symbol for symbol in dict.fromkeys(symbols) if symbol in profiles_df.index]
+        )
+
     @staticmethod
     async def search(
         market_cap_more_than: Optional[int] = None,
@@ -85,6 +231,7 @@ class ScreenerAPI(BaseAPI):
         sector: Optional[str] = None,
         industry: Optional[str] = None,
         limit: Optional[int] = None,
+        refresh: bool = False,
     ) -> pd.DataFrame:
         """
         Searches for a list of stocks matching the provided criteria.
@@ -100,57 +247,244 @@ class ScreenerAPI(BaseAPI):
         :param sector: Company sector
         :param industry: Company industry
         :param limit: Number of results to return
+        :param refresh: Load the results past the caches (see Company.load)
         :return: Results that match the query
         """
-        result = fmpsdk.stock_screener(
-            apikey=BaseAPI._get_api_key(),
-            market_cap_lower_than=market_cap_less_than,
+        with Metrics.span("screener.search"):
+            symbols = await ScreenerAPI._get_universe(
+                market_cap_more_than=market_cap_more_than,
+                market_cap_less_than=market_cap_less_than,
+                country=country,
+                sector=sector,
+                industry=industry,
+                limit=limit,
+                refresh=refresh,
+            )
+            planner = ScreenerAPI.get_search_planner(
+                pe_ratio_more_than=pe_ratio_more_than,
+                pe_ratio_less_than=pe_ratio_less_than,
+                pb_ratio_more_than=pb_ratio_more_than,
+                pb_ratio_less_than=pb_ratio_less_than,
+                revenue_change_more_than=revenue_change_more_than,
+                refresh=refresh,
+            )
+            rows = [
+                row
+                async for row in ScreenerAPI._stream_matches(
+                    symbols, planner, ScreenerAPI.STREAM_CONCURRENCY, None
+                )
+            ]
+
+        if len(rows) == 0:
+            return pd.DataFrame()
+        # Rows stream in completion order; restore the screener's order.
+        rows_df = pd.DataFrame(rows).set_index("Symbol")
+        return ScreenerAPI._select_profiles(rows_df, symbols).reset_index()
+
+    @staticmethod
+    async def get_stock_screener(
+        market_cap_more_than: Optional[int] = None,
+        market_cap_less_than: Optional[int] = None,
+        country: Optional[str] = None,
+        sector: Optional[str] = None,
+        industry: Optional[str] = None,
+        limit: Optional[int] = None,
+        refresh: bool = False,
+    ) -> list[dict]:
+        """
+        API call to list actively trading stocks (excluding ETFs) on the supported
+        exchanges that match the given criteria.
+        """
+        url = "/v3/stock-screener"
+        params: dict = {
+            "isEtf": "false",
+            "isActivelyTrading": "true",
+            "exchange": ",".join(ScreenerAPI.EXCHANGES),
+        }
+        optional_params = {
+            "marketCapMoreThan": market_cap_more_than,
+            "marketCapLowerThan": market_cap_less_than,
+            "country": country,
+            "sector": sector,
+            "industry": industry,
+            "limit": limit,
+        }
+        params.update(
+            {key: value for key, value in optional_params.items() if value is not None}
+        )
+        return await BaseAPI._get_async(url, params, refresh=refresh)
+
+    @staticmethod
+    async def search_stream(
+        market_cap_more_than: Optional[int] = None,
+        market_cap_less_than: Optional[int] = None,
+        pe_ratio_more_than: Optional[float] = None,
+        pe_ratio_less_than: Optional[float] = None,
+        pb_ratio_more_than: Optional[float] = None,
+        pb_ratio_less_than: Optional[float] = None,
+        revenue_change_more_than: Optional[float] = None,
+        country: Optional[str] = None,
+        sector: Optional[str] = None,
+        industry: Optional[str] = None,
+        limit: Optional[int] = None,
+        concurrency: int = STREAM_CONCURRENCY,
+        stats: Optional[PipelineStats] = None,
+        refresh: bool = False,
+    ) -> AsyncIterator[dict]:
+        """
+        Same as search, but yields each matching row as soon as it has loaded.
+
+        :param concurrency: Number of symbols to keep in flight
+        :param stats: Collects throughput and latency for the run
+        :param refresh: Load the results past the caches (see Company.load)
+        """
+        symbols = await ScreenerAPI._get_universe(
             market_cap_more_than=market_cap_more_than,
-            is_etf=False,
-            is_actively_trading=True,
+            market_cap_less_than=market_cap_less_than,
             country=country,
             sector=sector,
             industry=industry,
             limit=limit,
+            refresh=refresh,
+        )
+        planner = ScreenerAPI.get_search_planner(
+            pe_ratio_more_than=pe_ratio_more_than,
+            pe_ratio_less_than=pe_ratio_less_than,
+            pb_ratio_more_than=pb_ratio_more_than,
+            pb_ratio_less_than=pb_ratio_less_than,
+            revenue_change_more_than=revenue_change_more_than,
+            refresh=refresh,
         )
+        async for row in ScreenerAPI._stream_matches(
+            symbols, planner, concurrency, stats
+        ):
+            yield row
 
-        if len(result) == 0:
-            return pd.DataFrame()
+    @staticmethod
+    async def _get_universe(
+        market_cap_more_than: Optional[int],
+        market_cap_less_than: Optional[int],
+        country: Optional[str],
+        sector: Optional[str],
+        industry: Optional[str],
+        limit: Optional[int],
+        refresh: bool,
+    ) -> list[str]:
+        """
+        Returns the symbols the screener lists for the criteria, in its order.
+        """
+        with Metrics.span("screener.universe"):
+            result = await ScreenerAPI.get_stock_screener(
+                market_cap_more_than=market_cap_more_than,
+                market_cap_less_than=market_cap_less_than,
+                country=country,
+                sector=sector,
+                industry=industry,
+                limit=limit,
+                refresh=refresh,
+            )
+        logger.debug("Stock screener returned %d symbols", len(result))
 
-        print(result)
+        if len(result) == 0:
+            return []
 
         df = pd.DataFrame(result)
-        df = df.loc[df["exchangeShortName"].isin(["NASDAQ", "AMEX", "NYSE"])]
-        symbols = list(df["symbol"])
+        df = df.loc[df["exchangeShortName"].isin(ScreenerAPI.EXCHANGES)]
+        return list(df["symbol"])
 
-        responses = []
+    @staticmethod
+    async def _stream_matches(
+        symbols: list[str],
+        planner: ScreenerPlanner,
+        concurrency: int,
+        stats: Optional[PipelineStats],
+    ) -> AsyncIterator[dict]:
+        """
+        Yields a row for each symbol the planner accepts, in completion order.
+        """
 
-        window = 10
-        for idx in range(0, len(symbols), window):
-            response = await ScreenerAPI.get_company_profiles(
-                symbols[idx: idx + window]
-            )
-            responses.extend(response)
+        async def _load_row(symbol: str) -> Optional[dict]:
+            with Metrics.span("screener.filter"):
+                company = await planner.run(symbol)
+            if company is None:
+                return None
+            with Metrics.span("screener.row"):
+                return ScreenerAPI.get_profile_row(company)
 
-        profiles_df = pd.DataFrame(responses)
+        async for row in ScreenerAPI._stream_rows(
+            symbols, _load_row, concurrency, stats
+        ):
+            yield row
+
+    @staticmethod
+    def get_search_planner(
+        pe_ratio_more_than: Optional[float] = None,
+        pe_ratio_less_than: Optional[float] = None,
+        pb_ratio_more_than: Optional[float] = None,
+        pb_ratio_less_than: Optional[float] = None,
+        revenue_change_more_than: Optional[float] = None,
+        refresh: bool = False,
+    ) -> ScreenerPlanner:
+        """
+        Builds the planner that applies the per-company search filters.
+
+        Only companies that listed within the last five years are kept. Each
+        filter is checked against the same values that appear in the result row.
+        """
         date_before = (
             datetime.date.today() - datetime.timedelta(days=7 * 52 * 5)
         ).strftime("%Y-%m-%d")
-        profiles_df = profiles_df.loc[profiles_df["IPO Date"] > date_before]
-
-        if pe_ratio_more_than:
-            profiles_df = profiles_df.loc[profiles_df["P/E"] > pe_ratio_more_than]
-        if pe_ratio_less_than:
-            profiles_df = profiles_df.loc[profiles_df["P/E"] < pe_ratio_less_than]
-        if pb_ratio_more_than:
-            profiles_df = profiles_df.loc[profiles_df["P/B"] > pb_ratio_more_than]
-        if pb_ratio_less_than:
-            profiles_df = profiles_df.loc[profiles_df["P/B"] < pb_ratio_less_than]
-        if revenue_change_more_than:
-            profiles_df = profiles_df.loc[
-                profiles_df["Revenue Change (%)"] > revenue_change_more_than
-            ]
 
-        profiles_df.set_index("Symbol")
+        def _ipo_date(company: Company) -> bool:
+            ipo_date = company.profile["ipoDate"]
+            return bool(ipo_date) and ipo_date > date_before
 
-        return profiles_df
+        def _pe(company: Company) -> float:
+            return CompanyData.get_last_ratio_value(company, "priceEarningsRatio")
+
+        def _pb(company: Company) -> float:
+            return CompanyData.get_last_ratio_value(company, "priceToBookRatio")
+
+        predicates = [Predicate("IPO date", ("profile",), _ipo_date, 0.3)]
+        predicates += ScreenerAPI._range_predicates(
+            "P/E", ("ratios",), _pe, pe_ratio_more_than, pe_ratio_less_than
+        )
+        predicates += ScreenerAPI._range_predicates(
+            "P/B", ("ratios",), _pb, pb_ratio_more_than, pb_ratio_less_than
+        )
+        predicates += ScreenerAPI._range_predicates(
+            "Revenue Change (%)",
+            ("income",),
+            CompanyData.get_last_revenue_percentage_change,
+            revenue_change_more_than,
+            None,
+        )
+
+        return ScreenerPlanner(
+            predicates,
+            output_fields=ScreenerAPI.PROFILE_FIELDS,
+            chart_days=ScreenerAPI.PROFILE_CHART_DAYS,
+            compact=True,
+            refresh=refresh,
+        )
+
+    @staticmethod
+    def _range_predicates(
+        name: str,
+        fields: tuple[str, ...],
+        value: Callable[[Company], float],
+        more_than: Optional[float],
+        less_than: Optional[float],
+    ) -> list[Predicate]:
+        predicates = []
+        if more_than:
+            lower = more_than
+            predicates.append(
+                Predicate(f"{name} >", fields, lambda c: value(c) > lower)
+            )
+        if less_than:
+            upper = less_than
+            predicates.append(
+                Predicate(f"{name} <", fields, lambda c: value(c) < upper)
+            )
+        return predicates
@@ -0,0 +1,162 @@
+from typing import Callable, Iterable, Optional
+
+from analysis.models.company import Company
+
+
+class Predicate:
+    """
+    A screener filter together with the datasets needed to evaluate it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fields: tuple[str, ...],
+        check: Callable[[Company], bool],
+        selectivity: float = 0.5,
+    ) -> None:
+        """
+        :param name: Label used in planner statistics
+        :param fields: Datasets the check reads
+        :param check: Returns True if the company passes the filter
+        :param selectivity: Prior estimate of the fraction of companies that pass
+        """
+        self.name = name
+        self.fields = fields
+        self.check = check
+        self.prior = selectivity
+        self.evaluated = 0
+        self.passed = 0
+
+    @property
+    def selectivity(self) -> float:
+        """
+        Returns the pass rate observed so far, smoothed towards the prior.
+        """
+        weight = 10
+        return (self.passed + self.prior * weight) / (self.evaluated + weight)
+
+    def evaluate(self, company: Company) -> bool:
+        """
+        Evaluates the filter and records the outcome.
+        """
+        self.evaluated += 1
+        try:
+            result = bool(self.check(company))
+        except (KeyError, IndexError, TypeError):
+            result = False
+        self.passed += result
+        return result
+
+
+class ScreenerPlanner:
+    """
+    Evaluates screener filters in order of cost and selectivity, fetching only the
+    datasets each stage needs and dropping a symbol as soon as it fails one.
+    """
+
+    # Relative cost of fetching each dataset. Statements and ratios are small,
+    # the daily chart is the largest payload.
+    FIELD_COSTS = {
+        "profile": 1.0,
+        "quote": 1.0,
+        "ratios": 1.5,
+        "income": 1.5,
+        "balance_sheet": 1.5,
+        "cashflow": 1.5,
+        "estimates": 1.5,
+        "daily_shares": 3.0,
+        "daily_chart": 3.0,
+    }
+
+    def __init__(
+        self,
+        predicates: Iterable[Predicate],
+        output_fields: Iterable[str],
+        chart_days: Optional[int] = None,
+        compact: bool = False,
+        refresh: bool = False,
+    ) -> None:
+        """
+        :param predicates: Filters a company must pass
+        :param output_fields: Datasets needed to build the result for a company
+            that passes every filter
+        :param chart_days: Number of recent days to load for the daily chart
+        :param compact: Load companies in compact mode (see Company.load)
+        :param refresh: Load companies past the caches (see Company.load)
+        """
+        self.predicates = list(predicates)
+        self.output_fields = tuple(output_fields)
+        self.chart_days = chart_days
+        self.compact = compact
+        self.refresh = refresh
+        self.fields_loaded = 0
+
+    def plan(self, loaded: Optional[set[str]] = None) -> list[Predicate]:
+        """
+        Orders the filters so that cheap, selective ones run first.
+
+        A filter's rank is the cost of the datasets it still needs divided by the
+        fraction of companies it removes. Datasets fetched for an earlier filter
+        are free for later ones, so the order is chosen greedily.
+        """
+        loaded = set(loaded or ())
+        remaining = list(self.predicates)
+        ordered = []
+        while remaining:
+            best = min(remaining, key=lambda p: self._rank(p, loaded))
+            ordered.append(best)
+            remaining.remove(best)
+            loaded.update(best.fields)
+        return ordered
+
+    def _rank(self, predicate: Predicate, loaded: set[str]) -> float:
+        cost = sum(
+            self.FIELD_COSTS.get(field, 1.0)
+            for field in predicate.fields
+            if field not in loaded
+        )
+        rejected = max(1 - predicate.selectivity, 1e-6)
+        return cost / rejected
+
+    async def run(self, symbol: str) -> Optional[Company]:
+        """
+        Loads and filters a single symbol.
+
+        :return: The company with its output datasets loaded, or None if it was
+            rejected by one of the filters
+        """
+        company = await Company.load(
+            symbol, fields=(), compact=self.compact, refresh=self.refresh
+        )
+        for predicate in self.plan():
+            await self._load(company, predicate.fields)
+            if not predicate.evaluate(company):
+                return None
+
+        await self._load(company, self.output_fields)
+        return company
+
+    async def _load(self, company: Company, fields: Iterable[str]) -> None:
+        missing = set(fields) - company.fields
+        if missing:
+            await company.load_fields(
+                missing, chart_days=self.chart_days, refresh=self.refresh
+            )
+            self.fields_loaded += len(missing)
+
+    def stats(self) -> dict:
+        """
+        Returns evaluation counts and observed pass rates for each filter.
+        """
+        return {
+            "fields_loaded": self.fields_loaded,
+            "predicates": {
+                predicate.name: {
+                    "evaluated": predicate.evaluated,
+                    "passed": predicate.passed,
+                    "selectivity": round(predicate.selectivity, 3),
+                }
+                for predicate in self.predicates
+            },
+        }
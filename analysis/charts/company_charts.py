@@ -1,5 +1,7 @@
 import datetime
+from typing import Any, Optional
 
+import numpy as np
 import pandas as pd
 import plotly.express as px  # type: ignore
 import plotly.graph_objects as go  # type: ignore
@@ -7,11 +9,60 @@ from plotly.graph_objs import Figure
 from plotly.subplots import make_subplots  # type: ignore
 
 from analysis.api.company_api import CompanyAPI
+from analysis.api.metrics import Metrics
+from analysis.charts.downsample import Downsample
+from analysis.charts.figure_cache import FigureCache
 from analysis.models.company import Company
 
 
 class CompanyCharts:
+    # Visible ranges offered for time series, in days back from the latest point.
+    PERIODS: dict[str, Optional[int]] = {
+        "1M": 31,
+        "6M": 183,
+        "1Y": 365,
+        "5Y": 5 * 365,
+        "Max": None,
+    }
+
+    # Maximum number of points sent to the browser per time series.
+    MAX_POINTS = 1_500
+
+    # Series with more points than this are drawn with WebGL instead of SVG.
+    WEBGL_THRESHOLD = 1_000
+
+    # Datasets each chart is built from, which version its cached figure.
+    DATASETS = {
+        "get_revenue_estimates": ("income", "estimates"),
+        "get_daily_chart": ("daily_chart",),
+        "get_shares_float": ("daily_shares",),
+        "get_rnd_selling": ("income",),
+        "get_simple_financials": ("income", "balance_sheet"),
+        "get_key_metrics": ("ratios",),
+    }
+
+    FIGURES = FigureCache()
+
     @staticmethod
+    def get_cached(company: Company, chart: str, *args: Any) -> dict:
+        """
+        Returns a chart from the figure cache, building it only if the company's
+        datasets have changed since it was cached.
+
+        :param chart: Name of a chart function listed in CompanyCharts.DATASETS
+        :param args: Extra arguments for the chart function
+        :return: The figure as a dict
+        """
+        with Metrics.span("charts.get_cached", chart=chart):
+            version = company.get_data_version(CompanyCharts.DATASETS[chart])
+            key = (company.symbol, chart, args, version)
+            build = getattr(CompanyCharts, chart)
+            return CompanyCharts.FIGURES.get_or_build(
+                key, lambda: build(company, *args)
+            )
+
+    @staticmethod
+    @Metrics.timed("charts.revenue_estimates")
     def get_revenue_estimates(company: Company) -> Figure:
         """
         Returns a chart showing analyst revenue estimates.
@@ -49,22 +100,73 @@ class CompanyCharts:
         return fig
 
     @staticmethod
-    def get_daily_chart(company: Company) -> Figure:
+    @Metrics.timed("charts.daily_chart")
+    def get_daily_chart(
+        company: Company, period: str = "Max", max_points: int = MAX_POINTS
+    ) -> Figure:
         """
         Returns a chart showing the adjusted closing price.
+
+        :param period: Visible range, one of CompanyCharts.PERIODS
+        :param max_points: Number of points the range is downsampled to
         """
         title = "Closing Prices"
-        return px.line(company.daily_chart, x="date", y="adjClose", title=title)
+        return CompanyCharts._get_time_series(
+            company.daily_chart, "adjClose", title, period, max_points
+        )
 
     @staticmethod
-    def get_shares_float(company: Company) -> Figure:
+    @Metrics.timed("charts.shares_float")
+    def get_shares_float(
+        company: Company, period: str = "Max", max_points: int = MAX_POINTS
+    ) -> Figure:
         """
         Returns a chart showing the number of shares circulating the public market.
+
+        :param period: Visible range, one of CompanyCharts.PERIODS
+        :param max_points: Number of points the range is downsampled to
         """
         title = "Shares Float"
-        return px.line(company.daily_shares, x="date", y="floatShares", title=title)
+        return CompanyCharts._get_time_series(
+            company.daily_shares, "floatShares", title, period, max_points
+        )
+
+    @staticmethod
+    def _get_time_series(
+        df: pd.DataFrame, column: str, title: str, period: str, max_points: int
+    ) -> Figure:
+        """
+        Draws a dated series as a line, limited to the visible period and
+        downsampled with LTTB so long histories stay light in the browser. The
+        point budget applies to the visible range, so shorter periods show more
+        detail.
+        """
+        dates = pd.to_datetime(df["date"]).to_numpy("datetime64[ns]")
+        values = df[column].to_numpy("float64", na_value=np.nan)
+        order = np.argsort(dates, kind="stable")
+        dates, values = dates[order], values[order]
+        keep = ~np.isnan(values)
+        dates, values = dates[keep], values[keep]
+
+        days = CompanyCharts.PERIODS[period]
+        if days is not None and len(dates) > 0:
+            start = dates[-1] - np.timedelta64(days, "D")
+            dates, values = dates[dates >= start], values[dates >= start]
+
+        indices = Downsample.lttb(dates.astype("int64"), values, max_points)
+        trace = (
+            go.Scattergl if len(indices) > CompanyCharts.WEBGL_THRESHOLD else go.Scatter
+        )
+        # Daily points only need the date, which keeps the JSON short.
+        x = np.datetime_as_string(dates[indices], unit="D")
+        fig = go.Figure(trace(x=x, y=values[indices], mode="lines", name=column))
+        fig.update_layout(
+            title=dict(text=title), xaxis_title="date", yaxis_title=column
+        )
+        return fig
 
     @staticmethod
+    @Metrics.timed("charts.rnd_selling")
     def get_rnd_selling(company: Company) -> Figure:
         """
         Returns a chart comparing expenses against revenue.
@@ -104,6 +206,7 @@ class CompanyCharts:
         return fig
 
     @staticmethod
+    @Metrics.timed("charts.simple_financials")
     def get_simple_financials(company: Company) -> Figure:
         """Returns a chart comparing simple financial metrics"""
         fig = go.Figure(
@@ -151,6 +254,7 @@ class CompanyCharts:
         return fig
 
     @staticmethod
+    @Metrics.timed("charts.key_metrics")
     def get_key_metrics(company: Company) -> Figure:
         """
         Returns a chart comparing key computed metrics (e.g. P/E, P/B)
@@ -183,11 +287,12 @@ class CompanyCharts:
         return fig
 
     @staticmethod
-    def get_employee_count(company: Company):
+    @Metrics.timed("charts.employee_count")
+    async def get_employee_count(company: Company):
         """
         Returns a chart showing employee count over time.
         """
-        employee_history = pd.DataFrame(CompanyAPI.get_employee_history(company.symbol))
+        employee_history = await CompanyAPI.get_employee_history(company.symbol)
 
         if len(employee_history):
             fig = go.Figure(
@@ -0,0 +1,60 @@
+from typing import cast
+
+import numpy as np
+
+
+class Downsample:
+    @staticmethod
+    def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+        """
+        Picks the indices of at most `points` samples that preserve the visual
+        shape of a series, using Largest-Triangle-Three-Buckets.
+
+        The first and last samples are always kept. The rest are split into equal
+        buckets, and from each bucket the sample forming the largest triangle with
+        the previously kept sample and the average of the next bucket is kept.
+
+        :param x: Sample positions in ascending order
+        :param y: Sample values
+        :param points: Maximum number of samples to keep, at least 3
+        :return: Indices of the kept samples, in ascending order
+        """
+        count = len(x)
+        if points >= count or points < 3:
+            return np.arange(count)
+
+        x = np.asarray(x, dtype="float64")
+        y = np.asarray(y, dtype="float64")
+        # Bucket boundaries for the samples between the first and the last, with
+        # the last sample as a final bucket of its own.
+        edges = np.append(np.linspace(1, count - 1, points - 1).astype(int), count)
+        sizes = np.diff(edges)
+        mean_x = np.add.reduceat(x, edges[:-1]) / sizes
+        mean_y = np.add.reduceat(y, edges[:-1]) / sizes
+
+        # Buckets hold only a few samples each, so plain floats beat per-bucket
+        # array operations in this sequential loop.
+        # NumPy's stubs type tolist() by the array's shape alone, not its dtype.
+        xs = cast(list[float], x.tolist())
+        ys = cast(list[float], y.tolist())
+        starts = cast(list[int], edges.tolist())
+        means_x = cast(list[float], mean_x.tolist())
+        means_y = cast(list[float], mean_y.tolist())
+
+        indices = [0]
+        previous = 0
+        for bucket in range(points - 2):
+            px, py = xs[previous], ys[previous]
+            next_x, next_y = means_x[bucket + 1], means_y[bucket + 1]
+            best, best_area = starts[bucket], -1.0
+            for idx in range(starts[bucket], starts[bucket + 1]):
+                # Twice the triangle area; the factor doesn't change the argmax.
+                area = abs(
+                    (px - next_x) * (ys[idx] - py) - (px - xs[idx]) * (next_y - py)
+                )
+                if area > best_area:
+                    best, best_area = idx, area
+            indices.append(best)
+            previous = best
+        indices.append(count - 1)
+        return np.array(indices)
@@ -0,0 +1,65 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from plotly.graph_objs import Figure
+
+
+class FigureCache:
+    """
+    Figures serialized to JSON, shared by every session in the process and
+    evicted least recently used first.
+
+    Keys should include a version of the data a figure was built from, so a
+    figure is rebuilt as soon as its data changes rather than after a TTL.
+    """
+
+    max_entries: int
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._figures: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Figure]) -> dict:
+        """
+        Returns the figure cached under a key, building and caching it on a miss.
+
+        :return: A fresh copy of the figure as a dict, which st.plotly_chart
+            accepts and callers may modify
+        """
+        with self._lock:
+            serialized = self._figures.get(key)
+            if serialized is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+        if serialized is None:
+            serialized = build().to_json()
+            with self._lock:
+                self.misses += 1
+                self._figures[key] = serialized
+                while len(self._figures) > self.max_entries:
+                    self._figures.popitem(last=False)
+        return json.loads(serialized)
+
+    def clear(self) -> None:
+        """
+        Removes every cached figure.
+        """
+        with self._lock:
+            self._figures.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns the number of cached figures, their total size, hits and misses.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._figures),
+                "bytes": sum(len(figure) for figure in self._figures.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
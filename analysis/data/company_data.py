@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
+from analysis.api.metrics import Metrics
 from analysis.data.templates.profile import PROFILE_TEMPLATE
 from analysis.models.company import Company
 from analysis.utils import format_number
@@ -11,7 +14,8 @@ class CompanyData:
         """
         Calculates the percentage change between two numbers.
         """
-        change = (new_value - old_value) / old_value
+        # NumPy scalars round the way PanelData does, including float32 inputs.
+        change = (np.float64(new_value) - np.float64(old_value)) / np.float64(old_value)
         return round(change * 100, 2)
 
     @staticmethod
@@ -37,7 +41,7 @@ class CompanyData:
         Returns a rounded ratio.
         """
         if len(company.ratios) > 0:
-            return round(company.ratios.iloc[0][key], 2)
+            return round(np.float64(company.ratios.iloc[0][key]), 2)
         return float("-inf")
 
     @staticmethod
@@ -45,7 +49,7 @@ class CompanyData:
         """
         Returns the change between last two company revenues in dollar amount.
         """
-        if "revenue" in company.income:
+        if "revenue" in company.income and len(company.income["revenue"]) > 1:
             return format_number(
                 company.income["revenue"].iloc[0] - company.income["revenue"].iloc[1]
             )
@@ -68,6 +72,7 @@ class CompanyData:
         return float("-inf")
 
     @staticmethod
+    @Metrics.timed("company_data.profile")
     def get_profile(company: Company) -> dict:
         """
         Returns a company's complete profile in a dictionary.
@@ -102,6 +107,7 @@ class CompanyData:
         print(PROFILE_TEMPLATE.format(**kwargs))
 
     @staticmethod
+    @Metrics.timed("company_data.company_cash_runway")
     def get_company_cash_runway(company: Company) -> pd.DataFrame:
         """
         Calculates and returns the company runway based on:
@@ -114,23 +120,111 @@ class CompanyData:
 
         A positive value does not mean anything, as more cash is flowing in as opposed to flowing out.
         """
-        results = []
-
         min_len = min(len(company.balance_sheet), len(company.cashflow))
-        for idx1 in range(min_len - 3):
-            trailing_free_cashflow = 0
+        if min_len < 4:
+            return pd.DataFrame()
+
+        cash = company.balance_sheet["cashAndCashEquivalents"].to_numpy("float64")
+        free_cashflow = company.cashflow["freeCashFlow"].to_numpy("float64")
 
-            for idx2 in range(4):
-                trailing_free_cashflow += company.cashflow.iloc[idx1 + idx2][
-                    "freeCashFlow"
-                ]
+        return CompanyData._get_runway_columns(
+            cash[: min_len - 3],
+            free_cashflow[: min_len - 3],
+            CompanyData._get_trailing_sums(free_cashflow[:min_len]),
+        )
+
+    @staticmethod
+    @Metrics.timed("company_data.cash_runway_batch")
+    def get_cash_runway_batch(companies: list[Company]) -> pd.DataFrame:
+        """
+        Calculates the cash runway for many companies at once.
+
+        Returns the same columns as get_company_cash_runway, indexed by
+        (symbol, quarter) where quarter 0 is the most recent.
+        """
+        symbols = []
+        cash = []
+        free_cashflow = []
+        for company in companies:
+            min_len = min(len(company.balance_sheet), len(company.cashflow))
+            if min_len == 0:
+                continue
+            symbols.append(np.full(min_len, company.symbol, dtype=object))
+            balance_sheet = company.balance_sheet.iloc[:min_len]
+            cashflow = company.cashflow.iloc[:min_len]
+            cash.append(balance_sheet["cashAndCashEquivalents"].to_numpy("float64"))
+            free_cashflow.append(cashflow["freeCashFlow"].to_numpy("float64"))
+
+        if not symbols:
+            return pd.DataFrame()
+
+        stacked_symbols = np.concatenate(symbols)
+        return CompanyData.get_cash_runway_panel(
+            pd.DataFrame(
+                {
+                    "symbol": stacked_symbols,
+                    "cashAndCashEquivalents": np.concatenate(cash),
+                }
+            ),
+            pd.DataFrame(
+                {
+                    "symbol": stacked_symbols,
+                    "freeCashFlow": np.concatenate(free_cashflow),
+                }
+            ),
+        )
 
-            cash = company.balance_sheet.iloc[idx1]["cashAndCashEquivalents"]
+    @staticmethod
+    @Metrics.timed("company_data.cash_runway_panel")
+    def get_cash_runway_panel(
+        balance_sheets: pd.DataFrame, cashflows: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Calculates the cash runway from stacked statement panels.
+
+        Both panels need a symbol column and must hold the same number of rows per
+        symbol, most recent first and grouped by symbol. A trailing window is only
+        computed where all four quarters belong to the same symbol.
+        """
+        symbols = balance_sheets["symbol"].to_numpy()
+        cash = balance_sheets["cashAndCashEquivalents"].to_numpy("float64")
+        free_cashflow = cashflows["freeCashFlow"].to_numpy("float64")
+        if len(symbols) < 4:
+            return pd.DataFrame()
+
+        # Position of each row within its symbol, and the number of rows it has.
+        starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+        lengths = np.diff(np.r_[starts, len(symbols)])
+        positions = np.arange(len(symbols)) - np.repeat(starts, lengths)
+        remaining = np.repeat(lengths, lengths) - positions
+
+        trailing = CompanyData._get_trailing_sums(free_cashflow)
+        valid = np.flatnonzero(remaining[: len(trailing)] >= 4)
+
+        runway = CompanyData._get_runway_columns(
+            cash[valid], free_cashflow[valid], trailing[valid]
+        )
+        runway.index = pd.MultiIndex.from_arrays(
+            [symbols[valid], positions[valid]], names=["symbol", "quarter"]
+        )
+        return runway
 
-            burn_rate = trailing_free_cashflow / 12
-            last_quarter_burn_rate = company.cashflow.iloc[idx1]["freeCashFlow"] / 3
+    @staticmethod
+    def _get_trailing_sums(free_cashflow: np.ndarray) -> np.ndarray:
+        """
+        Sums each quarter's free cash flow with the three quarters before it.
+        """
+        return sliding_window_view(free_cashflow, 4).sum(axis=1)
 
-            results.append(
+    @staticmethod
+    def _get_runway_columns(
+        cash: np.ndarray, free_cashflow: np.ndarray, trailing_free_cashflow: np.ndarray
+    ) -> pd.DataFrame:
+        burn_rate = trailing_free_cashflow / 12
+        last_quarter_burn_rate = free_cashflow / 3
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return pd.DataFrame(
                 {
                     "12 Month Average Runway": cash / burn_rate,
                     "12 Month Burn Rate": burn_rate,
@@ -138,5 +232,3 @@ class CompanyData:
                     "3 Month Burn Rate": last_quarter_burn_rate,
                 }
             )
-
-        return pd.DataFrame(results)
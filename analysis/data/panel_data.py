@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from analysis.models.company import Company
+from analysis.utils import format_number
+
+
+class PanelData:
+    """
+    Screener metrics for many companies computed in one vectorized pass.
+
+    Prices, ratios and revenues are stacked into arrays with one row per company,
+    padded with NaN, so each metric is a single array operation rather than a
+    scalar lookup per company. Results match the per-company functions in
+    CompanyData.
+    """
+
+    # Trading days looked back by the price change columns.
+    CHANGE_DAYS = {"1 Week Change": 5, "1 Month Change": 20, "3 Month Change": 60}
+
+    RATIOS = {"P/E": "priceEarningsRatio", "P/B": "priceToBookRatio"}
+
+    symbols: list[str]
+    prices: np.ndarray
+    price_counts: np.ndarray
+    revenues: np.ndarray
+    revenue_counts: np.ndarray
+    has_revenue: np.ndarray
+    integer_revenue: np.ndarray
+    ratios: dict[str, np.ndarray]
+    ratio_counts: np.ndarray
+
+    def __init__(self, companies: list[Company]) -> None:
+        self.symbols = [company.symbol for company in companies]
+
+        width = max(self.CHANGE_DAYS.values()) + 1
+        prices, self.price_counts = PanelData._stack(
+            [company.daily_chart for company in companies], ["adjClose"], width
+        )
+        self.prices = prices["adjClose"]
+
+        # Revenues are read column by column, as their dtype is needed per company.
+        revenues = [company.income.get("revenue") for company in companies]
+        self.revenue_counts = np.array(
+            [len(company.income) for company in companies], dtype=int
+        )
+        self.revenues = PanelData._stack_columns(revenues, 2)
+        self.has_revenue = np.array(
+            [revenue is not None for revenue in revenues], dtype=bool
+        )
+        # Dollar changes of integer revenues are formatted without decimals.
+        self.integer_revenue = np.array(
+            [
+                revenue is not None and pd.api.types.is_integer_dtype(revenue)
+                for revenue in revenues
+            ],
+            dtype=bool,
+        )
+
+        self.ratios, self.ratio_counts = PanelData._stack(
+            [company.ratios for company in companies], list(self.RATIOS.values()), 1
+        )
+
+    @staticmethod
+    def _stack(
+        frames: list[pd.DataFrame], columns: list[str], width: int
+    ) -> tuple[dict[str, np.ndarray], np.ndarray]:
+        """
+        Stacks the first `width` values of each column from every frame into a
+        matrix per column, returning them together with the number of rows in
+        each frame.
+
+        The frames are concatenated once, so each column is read a single time
+        rather than once per frame.
+        """
+        counts = np.array([len(frame) for frame in frames], dtype=int)
+        matrices = {column: np.full((len(frames), width), np.nan) for column in columns}
+        if counts.sum() == 0:
+            return matrices, counts
+
+        stacked = pd.concat(
+            [frame for frame in frames if len(frame) > 0],
+            ignore_index=True,
+            sort=False,
+        )
+        starts = np.cumsum(counts) - counts
+        for column in columns:
+            if column in stacked:
+                PanelData._fill(
+                    matrices[column],
+                    stacked[column].to_numpy("float64"),
+                    starts,
+                    counts,
+                )
+        return matrices, counts
+
+    @staticmethod
+    def _stack_columns(series: list[pd.Series | None], width: int) -> np.ndarray:
+        """
+        Stacks the first `width` values of each series into a matrix, leaving the
+        rows of missing series NaN.
+        """
+        matrix = np.full((len(series), width), np.nan)
+        present = [column for column in series if column is not None]
+        if present:
+            counts = np.array(
+                [len(column) if column is not None else 0 for column in series]
+            )
+            values = np.concatenate([column.to_numpy("float64") for column in present])
+            PanelData._fill(matrix, values, np.cumsum(counts) - counts, counts)
+        return matrix
+
+    @staticmethod
+    def _fill(
+        matrix: np.ndarray, values: np.ndarray, starts: np.ndarray, counts: np.ndarray
+    ) -> None:
+        """
+        Copies the first values of each run in a flat array into the rows of a
+        matrix, where run i starts at starts[i] and has counts[i] values.
+        """
+        for offset in range(matrix.shape[1]):
+            rows = counts > offset
+            matrix[rows, offset] = values[starts[rows] + offset]
+
+    @staticmethod
+    def _percentage_change(new: np.ndarray, old: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.round((new - old) / old * 100, 2)
+
+    def get_daily_changes(self) -> pd.DataFrame:
+        """
+        Returns the percentage change in adjusted close price for each look-back
+        period, formatted like CompanyData.get_daily_change.
+        """
+        columns = {}
+        for name, days in self.CHANGE_DAYS.items():
+            old = self.prices[:, days]
+            valid = (self.price_counts > days) & (old != 0)
+            change = PanelData._percentage_change(self.prices[:, 0], old)
+            columns[name] = [
+                f"{value}%" if ok else "N/A"
+                for value, ok in zip(change.tolist(), valid.tolist())
+            ]
+        return pd.DataFrame(columns, index=self.symbols)
+
+    def get_revenue_changes(self) -> pd.DataFrame:
+        """
+        Returns the change between the last two revenues in dollars and as a
+        percentage, like the corresponding CompanyData functions.
+        """
+        latest, previous = self.revenues[:, 0], self.revenues[:, 1]
+        has_two = self.has_revenue & (self.revenue_counts > 1)
+
+        dollars = [
+            format_number(int(value) if integer else value) if ok else "N/A"
+            for value, ok, integer in zip(
+                (latest - previous).tolist(),
+                has_two.tolist(),
+                self.integer_revenue.tolist(),
+            )
+        ]
+        percentage = np.where(
+            has_two & (previous != 0),
+            PanelData._percentage_change(latest, previous),
+            float("-inf"),
+        )
+        return pd.DataFrame(
+            {"Revenue Change": dollars, "Revenue Change (%)": percentage},
+            index=self.symbols,
+        )
+
+    def get_last_ratios(self) -> pd.DataFrame:
+        """
+        Returns the most recent ratios rounded to two decimals, like
+        CompanyData.get_last_ratio_value.
+        """
+        has_ratios = self.ratio_counts > 0
+        return pd.DataFrame(
+            {
+                name: np.where(
+                    has_ratios, np.round(self.ratios[key][:, 0], 2), float("-inf")
+                )
+                for name, key in self.RATIOS.items()
+            },
+            index=self.symbols,
+        )
+
+    def get_screener_metrics(self) -> pd.DataFrame:
+        """
+        Returns every computed screener column, indexed by symbol.
+        """
+        return pd.concat(
+            [
+                self.get_daily_changes(),
+                self.get_revenue_changes(),
+                self.get_last_ratios(),
+            ],
+            axis=1,
+        )
@@ -1,11 +1,11 @@
-import asyncio
-
 import streamlit as st
 
+from analysis.api.base_api import BaseAPI
 from analysis.data.company_data import CompanyData
 
 from analysis.frontend.company_overview.actions import on_watchlist_click, on_holdings_click
 from analysis.frontend.company_overview.right_pane import show_right_pane
+from analysis.frontend.page_cache import COMPANIES
 from analysis.models.company import Company
 from analysis.utils import format_number
 
@@ -63,7 +63,14 @@ with statistics:
             use_container_width=True,
         )
 
-    company = asyncio.run(Company.load(ticker))
+    # Refreshing reloads the company past every cache, not just this page's.
+    refresh = st.button("Refresh data", use_container_width=True)
+    if refresh:
+        COMPANIES.invalidate(ticker)
+
+    company = COMPANIES.get_or_load(
+        ticker, lambda: BaseAPI.run(Company.load(ticker, refresh=refresh))
+    )
     profile = CompanyData.get_profile(company)
 
     st.html('<span style="color:#A7A15A;font-size:150%;">Key Metrics</span>')
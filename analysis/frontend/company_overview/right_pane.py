@@ -6,30 +6,38 @@ from analysis.models.company import Company
 
 
 def show_right_pane(company: Company):
+	period = st.radio(
+		"Period",
+		list(CompanyCharts.PERIODS),
+		index=len(CompanyCharts.PERIODS) - 1,
+		horizontal=True,
+		label_visibility="collapsed",
+	)
+
 	col1, col2 = st.columns(2)
 	col3, col4 = st.columns(2)
 	col5, _ = st.columns(2)
 
 	# Create and display charts in each column
 	with col1:
-		chart = CompanyCharts.get_daily_chart(company)
+		chart = CompanyCharts.get_cached(company, "get_daily_chart", period)
 		st.plotly_chart(chart, use_container_width=True)
 
 	with col2:
-		chart = CompanyCharts.get_shares_float(company)
+		chart = CompanyCharts.get_cached(company, "get_shares_float", period)
 		st.plotly_chart(chart, use_container_width=True)
 
 	with col3:
-		chart = CompanyCharts.get_rnd_selling(company)
+		chart = CompanyCharts.get_cached(company, "get_rnd_selling")
 		st.plotly_chart(chart, use_container_width=True)
 
 	with col4:
-		chart = CompanyCharts.get_simple_financials(company)
+		chart = CompanyCharts.get_cached(company, "get_simple_financials")
 		st.plotly_chart(chart, use_container_width=True)
 
 	with col5:
-		chart = CompanyCharts.get_revenue_estimates(company)
+		chart = CompanyCharts.get_cached(company, "get_revenue_estimates")
 		st.plotly_chart(chart, use_container_width=True)
 
-	chart = CompanyCharts.get_key_metrics(company)
+	chart = CompanyCharts.get_cached(company, "get_key_metrics")
 	st.plotly_chart(chart, use_container_width=True)
\ No newline at end of file
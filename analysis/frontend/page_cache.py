@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class PageCache:
+    """
+    Results loaded by the Streamlit pages, kept across reruns and shared by every
+    browser session in the server process.
+
+    Streamlit reruns a page script on every interaction, so anything loaded from
+    the API is looked up here first. Entries expire after a TTL and the least
+    recently used entry is evicted once the cache is full. Sessions run on
+    separate threads, so access is guarded by a lock.
+    """
+
+    ttl: float
+    max_entries: int
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns a cached value, or None if it is missing or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Stores a value, evicting the least recently used entries if full.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, load: Callable[[], T]) -> T:
+        """
+        Returns a cached value, calling load and caching its result on a miss.
+        """
+        value = self.get(key)
+        if value is None:
+            value = load()
+            self.set(key, value)
+        return value
+
+    def get_age(self, key: Hashable) -> Optional[float]:
+        """
+        Returns the number of seconds since a value was cached, or None if it
+        isn't cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else time.monotonic() - entry[0]
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Removes a single entry, or every entry if no key is given.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Returns the number of entries, hits and misses.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Fully loaded companies, keyed by ticker.
+COMPANIES = PageCache(ttl=15 * 60, max_entries=64)
+
+# Profile tables of the watchlist page, keyed by the symbols in each group.
+PROFILES = PageCache(ttl=5 * 60, max_entries=32)
+
+# Screener results and pipeline summaries, keyed by search criteria.
+SEARCHES = PageCache(ttl=15 * 60, max_entries=32)
@@ -1,8 +1,26 @@
-import asyncio
+from typing import Optional, TypedDict
 
+import pandas as pd
 import streamlit as st
 
+from analysis.api.base_api import BaseAPI
+from analysis.api.pipeline_stats import PipelineStats
 from analysis.api.screener_api import ScreenerAPI
+from analysis.frontend.page_cache import SEARCHES
+
+
+class SearchCriteria(TypedDict):
+    market_cap_more_than: Optional[int]
+    market_cap_less_than: Optional[int]
+    pe_ratio_less_than: Optional[float]
+    pe_ratio_more_than: Optional[float]
+    pb_ratio_less_than: Optional[float]
+    pb_ratio_more_than: Optional[float]
+    revenue_change_more_than: Optional[float]
+    country: str
+    sector: str
+    limit: int
+
 
 st.title("Screener")
 
@@ -50,28 +68,61 @@ with rev_change_min:
         "",
     )
 
-result = asyncio.run(
-    ScreenerAPI.search(
-        market_cap_more_than=int(mkt_cap_min_input)
-        if mkt_cap_min_input != ""
-        else None,
-        market_cap_less_than=int(mkt_cap_max_input)
-        if mkt_cap_max_input != ""
-        else None,
-        pe_ratio_less_than=int(pe_min_input) if pe_min_input != "" else None,
-        pe_ratio_more_than=int(pe_max_input) if pe_max_input != "" else None,
-        pb_ratio_less_than=int(pb_min_input) if pb_min_input != "" else None,
-        pb_ratio_more_than=int(pb_max_input) if pb_max_input != "" else None,
-        revenue_change_more_than=int(rev_change_min_input)
-        if rev_change_min_input != ""
-        else None,
-        country="US",
-        sector="Technology",
-        limit=100,
-    )
-)
+criteria: SearchCriteria = {
+    "market_cap_more_than": int(mkt_cap_min_input) if mkt_cap_min_input != "" else None,
+    "market_cap_less_than": int(mkt_cap_max_input) if mkt_cap_max_input != "" else None,
+    "pe_ratio_less_than": int(pe_min_input) if pe_min_input != "" else None,
+    "pe_ratio_more_than": int(pe_max_input) if pe_max_input != "" else None,
+    "pb_ratio_less_than": int(pb_min_input) if pb_min_input != "" else None,
+    "pb_ratio_more_than": int(pb_max_input) if pb_max_input != "" else None,
+    "revenue_change_more_than": int(rev_change_min_input)
+    if rev_change_min_input != ""
+    else None,
+    "country": "US",
+    "sector": "Technology",
+    "limit": 100,
+}
+search_key = tuple(sorted(criteria.items()))
+
+# Refreshing reloads the results past every cache, not just this page's.
+refresh = st.button("Refresh results")
+if refresh:
+    SEARCHES.invalidate(search_key)
+
+table = st.empty()
+progress = st.empty()
 
-num_rows = len(result)
-height = (num_rows + 1) * 35 + 3
 
-st.dataframe(result, use_container_width=True, height=height)
+def show_rows(rows: list[dict]) -> None:
+    height = (len(rows) + 1) * 35 + 3
+    table.dataframe(pd.DataFrame(rows), use_container_width=True, height=height)
+
+
+async def render_results(stats: PipelineStats) -> list[dict]:
+    rows = []
+    async for row in ScreenerAPI.search_stream(
+        **criteria, stats=stats, refresh=refresh
+    ):
+        rows.append(row)
+        show_rows(rows)
+        progress.caption(f"{stats.completed} symbols loaded...")
+    return rows
+
+
+cached = SEARCHES.get(search_key)
+if cached is None:
+    stats = PipelineStats()
+    rows = BaseAPI.run(render_results(stats))
+    summary = stats.summary()
+    SEARCHES.set(search_key, (rows, summary))
+else:
+    rows, summary = cached
+    show_rows(rows)
+
+age = SEARCHES.get_age(search_key) or 0
+progress.caption(
+    f"{summary['symbols']} symbols ({summary['failed']} failed) in "
+    f"{summary['elapsed']}s, {summary['symbols_per_sec']} symbols/sec, "
+    f"latency p50 {summary['p50']}s / p95 {summary['p95']}s / p99 {summary['p99']}s"
+    f" - loaded {int(age // 60)} min ago"
+)
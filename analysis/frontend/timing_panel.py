@@ -0,0 +1,34 @@
+import pandas as pd
+import streamlit as st
+
+
+class TimingPanel:
+    @staticmethod
+    def show(spans: list[dict], elapsed: float) -> None:
+        """
+        Shows where a page run spent its time, one row per span name and labels,
+        in a collapsed expander at the bottom of the page.
+
+        :param spans: Spans collected by Metrics.trace during the run
+        :param elapsed: Seconds the whole run took
+        """
+        with st.expander(f"Timings ({elapsed * 1e3:.0f} ms)"):
+            if not spans:
+                st.caption("Nothing was timed; the page was served from cache.")
+                return
+            frame = pd.DataFrame(spans).drop(columns="start").fillna("")
+            keys = [column for column in frame.columns if column != "seconds"]
+            summary = (
+                frame.groupby(keys)["seconds"]
+                .agg(calls="count", total="sum", max="max")
+                .sort_values("total", ascending=False)
+            )
+            summary[["total", "max"]] = (summary[["total", "max"]] * 1e3).round(1)
+            st.dataframe(
+                summary.rename(columns={"total": "total (ms)", "max": "max (ms)"}),
+                use_container_width=True,
+            )
+            st.caption(
+                "Spans overlap when they run concurrently, so totals can exceed "
+                "the page time."
+            )
@@ -2,8 +2,11 @@ import asyncio
 
 import streamlit as st
 
+from analysis.api.base_api import BaseAPI
 from analysis.api.screener_api import ScreenerAPI
+from analysis.frontend.page_cache import PROFILES
 from analysis.persistence.data_store import DataStore
+from analysis.workers.refresh import RefreshWorker
 
 st.title("Holdings & Watchlist")
 
@@ -11,8 +14,36 @@ ds = DataStore()
 watchlist = ds.get_watchlist()
 holdings = ds.get_holdings()
 
-watchlist_profiles = asyncio.run(ScreenerAPI.populate_profiles(watchlist))
-holdings_profiles = asyncio.run(ScreenerAPI.populate_profiles(holdings))
+# Refreshing reloads the profiles past every cache, not just this page's.
+refresh = st.button("Refresh data")
+if refresh:
+    PROFILES.invalidate()
+
+
+async def load_profiles(groups: dict[str, list[str]], refresh: bool):
+    symbols = list(dict.fromkeys(s for group in groups.values() for s in group))
+    profiles, refreshed = await asyncio.gather(
+        ScreenerAPI.populate_profiles(groups, refresh=refresh),
+        RefreshWorker.get_last_refreshed(symbols),
+    )
+    # Set by the background refresh worker (python -m analysis.workers.refresh).
+    for frame in profiles.values():
+        frame["Last Refreshed"] = [
+            max(refreshed[symbol].values()).strftime("%Y-%m-%d %H:%M UTC")
+            if symbol in refreshed
+            else "N/A"
+            for symbol in frame.index
+        ]
+    return profiles
+
+
+groups = {"holdings": holdings, "watchlist": watchlist}
+profiles = PROFILES.get_or_load(
+    (tuple(holdings), tuple(watchlist)),
+    lambda: BaseAPI.run(load_profiles(groups, refresh)),
+)
+holdings_profiles = profiles["holdings"]
+watchlist_profiles = profiles["watchlist"]
 
 st.title("Holdings")
 
@@ -25,4 +56,3 @@ st.title("Watchlist")
 num_rows = len(watchlist_profiles)
 height = (num_rows + 1) * 35 + 3
 st.dataframe(watchlist_profiles, use_container_width=True, height=height)
-
@@ -1,13 +1,67 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import hashlib
+import json
+import sys
+from typing import Any, Awaitable, Callable, Iterable, Optional
 
 import pandas as pd
 
 from analysis.api.company_api import CompanyAPI
+from analysis.api.metrics import Metrics
+from analysis.models.record import ProfileRecord, QuoteRecord, Record
+from analysis.persistence.price_store import PriceStore
+from analysis.persistence.snapshot_store import SnapshotStore
+from analysis.persistence.statement_store import StatementStore
 
 
 class Company:
+    # Datasets that can be loaded for a company, in constructor order.
+    FIELDS = (
+        "balance_sheet",
+        "income",
+        "cashflow",
+        "daily_chart",
+        "daily_shares",
+        "ratios",
+        "quote",
+        "profile",
+        "estimates",
+    )
+
+    # Columns kept for each dataset in compact mode; everything else is dropped.
+    COLUMNS = {
+        "balance_sheet": (
+            "date",
+            "cashAndCashEquivalents",
+            "totalAssets",
+            "totalLiabilities",
+            "netDebt",
+        ),
+        "income": (
+            "date",
+            "revenue",
+            "netIncome",
+            "researchAndDevelopmentExpenses",
+            "sellingAndMarketingExpenses",
+        ),
+        "cashflow": ("date", "freeCashFlow"),
+        "daily_chart": ("date", "adjClose"),
+        "daily_shares": ("date", "floatShares"),
+        "ratios": ("date", "priceEarningsRatio", "priceToBookRatio"),
+        "estimates": ("date", "estimatedRevenueAvg"),
+    }
+
+    # Record types that replace the quote and profile dicts in compact mode.
+    RECORDS: dict[str, type[Record]] = {"quote": QuoteRecord, "profile": ProfileRecord}
+
+    # Object columns with at most this ratio of unique values become categorical.
+    _CATEGORY_RATIO = 0.5
+
+    __slots__ = ("symbol", *FIELDS, "fields", "compact")
+
     symbol: str
     balance_sheet: pd.DataFrame
     income: pd.DataFrame
@@ -15,9 +69,11 @@ class Company:
     daily_chart: pd.DataFrame
     daily_shares: pd.DataFrame
     ratios: pd.DataFrame
-    quote: dict
-    profile: dict
+    quote: dict | Record
+    profile: dict | Record
     estimates: pd.DataFrame
+    fields: set[str]
+    compact: bool
 
     def __init__(
         self,
@@ -42,22 +98,270 @@ class Company:
         self.quote = quote
         self.profile = profile
         self.estimates = estimates
+        self.fields = set(Company.FIELDS)
+        self.compact = False
 
     @classmethod
-    async def load(cls, symbol: str) -> Company:
-        """
-        Loads all data pertaining to a ticker symbol.
-        """
-        tasks = [
-            CompanyAPI.get_balance_sheet_statements(symbol),
-            CompanyAPI.get_income_statements(symbol),
-            CompanyAPI.get_cash_flow_statements(symbol),
-            CompanyAPI.get_daily_chart(symbol),
-            CompanyAPI.get_daily_shares(symbol),
-            CompanyAPI.get_ratios(symbol),
-            CompanyAPI.get_full_quote(symbol),
-            CompanyAPI.get_company_profile(symbol),
-            CompanyAPI.get_analyst_estimates(symbol),
-        ]
-
-        return cls(symbol, *(await asyncio.gather(*tasks)))  # type: ignore
+    async def load(
+        cls,
+        symbol: str,
+        fields: Optional[Iterable[str]] = None,
+        chart_days: Optional[int] = None,
+        compact: bool = False,
+        refresh: bool = False,
+    ) -> Company:
+        """
+        Loads data pertaining to a ticker symbol.
+
+        :param symbol: Ticker symbol
+        :param fields: Datasets to load (see Company.FIELDS), defaults to all of them.
+            Datasets that aren't loaded are left empty.
+        :param chart_days: Number of most recent days to load for the daily chart,
+            defaults to the full history
+        :param compact: Keep only the columns listed in Company.COLUMNS with
+            smaller dtypes, and store the quote and profile as records. Floats
+            are downcast to float32, so values keep about 7 significant digits.
+        :param refresh: Fetch every dataset from the API, bypassing the response
+            cache and snapshots, and update them with the results
+        :return: The loaded company
+        """
+        requested = Company._validate_fields(fields)
+        with Metrics.span("company.load"):
+            data = await Company._fetch(symbol, requested, chart_days, compact, refresh)
+            if compact:
+                data = Company._compact_datasets(data)
+
+        company = cls(symbol, **{**Company._empty_datasets(), **data})
+        company.fields = requested
+        company.compact = compact
+        return company
+
+    async def load_fields(
+        self,
+        fields: Iterable[str],
+        chart_days: Optional[int] = None,
+        refresh: bool = False,
+    ) -> None:
+        """
+        Loads any of the given datasets that haven't been loaded yet.
+        """
+        missing = Company._validate_fields(fields) - self.fields
+        with Metrics.span("company.load_fields"):
+            data = await Company._fetch(
+                self.symbol, missing, chart_days, self.compact, refresh
+            )
+            if self.compact:
+                data = Company._compact_datasets(data)
+        for field, value in data.items():
+            setattr(self, field, value)
+        self.fields |= missing
+
+    def get_data_version(self, fields: Iterable[str]) -> str:
+        """
+        Returns a hash of the contents of the given datasets, which changes
+        whenever any of them does.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for field in fields:
+            dataset = getattr(self, field)
+            digest.update(field.encode())
+            if isinstance(dataset, pd.DataFrame):
+                digest.update(json.dumps(list(map(str, dataset.columns))).encode())
+                digest.update(pd.util.hash_pandas_object(dataset).to_numpy().tobytes())
+            else:
+                records = dataset.to_dict() if isinstance(dataset, Record) else dataset
+                digest.update(json.dumps(records, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get_memory_usage(self) -> pd.Series:
+        """
+        Returns the approximate number of bytes held by each dataset, including
+        the contents of object columns.
+        """
+        return pd.Series(
+            {
+                field: Company._get_dataset_memory_usage(getattr(self, field))
+                for field in Company.FIELDS
+            },
+            name="bytes",
+        )
+
+    @staticmethod
+    def _get_dataset_memory_usage(dataset: Any) -> int:
+        if isinstance(dataset, pd.DataFrame):
+            return int(dataset.memory_usage(deep=True).sum())
+        if isinstance(dataset, Record):
+            return dataset.get_memory_usage()
+        return sys.getsizeof(dataset) + sum(
+            sys.getsizeof(key) + sys.getsizeof(value) for key, value in dataset.items()
+        )
+
+    @staticmethod
+    def _compact_datasets(data: dict[str, Any]) -> dict[str, Any]:
+        compacted = {}
+        for field, dataset in data.items():
+            if field in Company.RECORDS:
+                compacted[field] = (
+                    Company.RECORDS[field].from_dict(dataset) if dataset else dataset
+                )
+            else:
+                compacted[field] = Company.compact_frame(
+                    dataset, Company.COLUMNS[field]
+                )
+        return compacted
+
+    @staticmethod
+    def compact_frame(frame: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+        """
+        Keeps the given columns of a dataset, parsing dates, downcasting numbers
+        and turning repeated strings into categoricals. Integers stay int64
+        since statement amounts can overflow narrower types when subtracted.
+        """
+        frame = frame[[column for column in columns if column in frame]]
+        compacted = {}
+        for column, values in frame.items():
+            if column == "date":
+                values = pd.to_datetime(values)
+            elif pd.api.types.is_float_dtype(values):
+                values = values.astype("float32")
+            elif pd.api.types.is_object_dtype(values):
+                if values.nunique() <= len(values) * Company._CATEGORY_RATIO:
+                    values = values.astype("category")
+            compacted[column] = values
+        return pd.DataFrame(compacted, index=frame.index)
+
+    @staticmethod
+    def _validate_fields(fields: Optional[Iterable[str]]) -> set[str]:
+        if fields is None:
+            return set(Company.FIELDS)
+        requested = set(fields)
+        unknown = requested - set(Company.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown company fields: {sorted(unknown)}")
+        return requested
+
+    @staticmethod
+    def _empty_datasets() -> dict[str, Any]:
+        return {
+            field: {} if field in ("quote", "profile") else pd.DataFrame()
+            for field in Company.FIELDS
+        }
+
+    @staticmethod
+    def get_loaders(
+        symbol: str,
+        chart_days: Optional[int] = None,
+        columns: Optional[dict[str, tuple[str, ...]]] = None,
+        refresh: bool = False,
+    ) -> dict[str, Callable[[], Awaitable[Any]]]:
+        """
+        Returns a function that loads each dataset from its own store or the API,
+        without going through the shared snapshots.
+
+        :param columns: Columns to keep by dataset (see Company.COLUMNS) when
+            building frames from API responses. Datasets served from the price
+            or statement stores keep all of theirs.
+        :param refresh: Bypass the response cache and check the stores for new
+            data even if none is due
+        """
+        columns = columns or {}
+        return {
+            "balance_sheet": lambda: Company._load_statements(
+                symbol, "balance_sheet", columns.get("balance_sheet"), refresh
+            ),
+            "income": lambda: Company._load_statements(
+                symbol, "income", columns.get("income"), refresh
+            ),
+            "cashflow": lambda: Company._load_statements(
+                symbol, "cashflow", columns.get("cashflow"), refresh
+            ),
+            "daily_chart": lambda: Company._load_daily_chart(
+                symbol, chart_days, columns.get("daily_chart"), refresh
+            ),
+            "daily_shares": lambda: CompanyAPI.get_daily_shares(
+                symbol, columns=columns.get("daily_shares"), refresh=refresh
+            ),
+            "ratios": lambda: CompanyAPI.get_ratios(
+                symbol, columns=columns.get("ratios"), refresh=refresh
+            ),
+            "quote": lambda: CompanyAPI.get_full_quote(symbol, refresh=refresh),
+            "profile": lambda: CompanyAPI.get_company_profile(symbol, refresh=refresh),
+            "estimates": lambda: CompanyAPI.get_analyst_estimates(
+                symbol, columns=columns.get("estimates"), refresh=refresh
+            ),
+        }
+
+    @staticmethod
+    async def _fetch(
+        symbol: str,
+        fields: set[str],
+        chart_days: Optional[int],
+        compact: bool,
+        refresh: bool,
+    ) -> dict[str, Any]:
+        # Share datasets between app replicas through MongoDB when it is
+        # configured. Truncated daily charts are sliced from a snapshot if there is
+        # one, but not stored. Snapshots are read by full loads too, so columns
+        # are only dropped while parsing responses when there are none.
+        store = SnapshotStore.get_default()
+        columns = Company.COLUMNS if compact and store is None else None
+        loaders = Company.get_loaders(symbol, chart_days, columns, refresh)
+        if store is not None:
+            for field in fields & SnapshotStore.TTLS.keys():
+                if field != "daily_chart" or not chart_days:
+                    loaders[field] = functools.partial(
+                        store.load, symbol, field, loaders[field], refresh
+                    )
+
+        async def _load(field: str) -> Any:
+            with Metrics.span("company.fetch", field=field):
+                return await loaders[field]()
+
+        ordered = [field for field in Company.FIELDS if field in fields]
+        results = await asyncio.gather(*(_load(field) for field in ordered))
+        return dict(zip(ordered, results))
+
+    @staticmethod
+    async def _load_daily_chart(
+        symbol: str,
+        chart_days: Optional[int],
+        columns: Optional[tuple[str, ...]] = None,
+        refresh: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Serves the daily chart from the local price store. A short chart for a
+        symbol that isn't stored yet is taken from a shared snapshot or fetched
+        directly instead of downloading its full history.
+        """
+        snapshots = SnapshotStore.get_default()
+        if chart_days and snapshots is not None and not refresh:
+            snapshot = await snapshots.get(symbol, "daily_chart")
+            if snapshot is not None:
+                return snapshot.iloc[:chart_days]
+
+        store = PriceStore.get_default()
+        if chart_days and not store.contains(symbol):
+            return await CompanyAPI.get_daily_chart(
+                symbol, chart_days, columns=columns, refresh=refresh
+            )
+        return await store.get_daily_chart(
+            symbol, days=chart_days, columns=columns, refresh=refresh
+        )
+
+    @staticmethod
+    async def _load_statements(
+        symbol: str,
+        kind: str,
+        columns: Optional[tuple[str, ...]] = None,
+        refresh: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Serves statements from MongoDB when it is configured, syncing new filings
+        as they become due, and from the API otherwise.
+        """
+        store = StatementStore.get_default()
+        if store is None:
+            return await StatementStore.FETCHERS[kind](
+                symbol, columns=columns, refresh=refresh
+            )
+        return await store.load(symbol, kind, refresh=refresh)
@@ -0,0 +1,92 @@
+import sys
+from typing import Any, Iterator
+
+
+class Record:
+    """
+    Fixed set of fields read from an API response, stored in slots rather than a
+    dict. Supports the read-only subset of the dict interface used by callers,
+    so record["key"] keeps working. Fields missing from the response are None.
+    """
+
+    __slots__: tuple[str, ...] = ()
+
+    def __init__(self, **values: Any) -> None:
+        for key in self.__slots__:
+            setattr(self, key, values.get(key))
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "Record":
+        """
+        Builds a record from an API response, dropping fields that aren't slots.
+        """
+        return cls(**values)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Record):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Returns a field, or the default if it isn't one of the record's slots.
+        """
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self) -> tuple[str, ...]:
+        """
+        Returns the record's field names.
+        """
+        return self.__slots__
+
+    def to_dict(self) -> dict:
+        """
+        Returns the record as a plain dict.
+        """
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def get_memory_usage(self) -> int:
+        """
+        Returns the approximate number of bytes held by the record and its values.
+        """
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(getattr(self, key)) for key in self.__slots__
+        )
+
+
+class QuoteRecord(Record):
+    __slots__ = ("symbol", "price", "marketCap", "earningsAnnouncement")
+
+
+class ProfileRecord(Record):
+    __slots__ = (
+        "symbol",
+        "companyName",
+        "mktCap",
+        "ipoDate",
+        "fullTimeEmployees",
+        "address",
+        "city",
+        "state",
+        "sector",
+        "industry",
+        "website",
+        "description",
+    )
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import weakref
+from typing import Iterable
+
+from pymongo import ASCENDING, AsyncMongoClient, UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+
+from analysis.api.base_api import BaseAPI
+from analysis.persistence.data_store import DataStore
+
+
+class AsyncDataStore:
+    """
+    Async counterpart of DataStore, built on PyMongo's async API, so reads and
+    writes can be gathered with CompanyAPI calls without blocking the event loop.
+    Uses the same collections and documents as DataStore.
+
+    An async client belongs to the event loop it was created on, so one client is
+    kept per loop and closed by BaseAPI.aclose (e.g. at the end of BaseAPI.run).
+    """
+
+    _WATCHLIST = DataStore._WATCHLIST
+    _HOLDINGS = DataStore._HOLDINGS
+
+    _clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncMongoClient] = (
+        weakref.WeakKeyDictionary()
+    )
+    _indexed: set[str] = set()
+
+    @property
+    def db(self) -> AsyncDatabase:
+        """
+        Returns the database on the running loop's client.
+        """
+        return AsyncDataStore._get_client().get_database(os.environ["MONGO_DB_NAME"])
+
+    @staticmethod
+    def _get_client() -> AsyncMongoClient:
+        """
+        Returns the running loop's client, creating it on first use.
+        """
+        loop = asyncio.get_running_loop()
+        client = AsyncDataStore._clients.get(loop)
+        if client is None:
+            client = AsyncMongoClient(os.environ["MONGO_URI"])
+            AsyncDataStore._clients[loop] = client
+            BaseAPI.add_close_callback(AsyncDataStore.aclose)
+        return client
+
+    @staticmethod
+    async def aclose() -> None:
+        """
+        Closes the running loop's client and its pooled connections.
+        """
+        client = AsyncDataStore._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates a unique index on symbol for the watchlist and holdings, removing
+        any duplicate entries saved before the index existed.
+        """
+        db = self.db
+        if db.name in AsyncDataStore._indexed:
+            return
+        for name in (self._WATCHLIST, self._HOLDINGS):
+            await AsyncDataStore._remove_duplicates(db[name])
+            await db[name].create_index([("symbol", ASCENDING)], unique=True)
+        AsyncDataStore._indexed.add(db.name)
+
+    @staticmethod
+    async def _remove_duplicates(collection: AsyncCollection) -> None:
+        cursor = await collection.aggregate(
+            [
+                {"$group": {"_id": "$symbol", "ids": {"$push": "$_id"}}},
+                {"$match": {"ids.1": {"$exists": True}}},
+            ]
+        )
+        extra_ids = [_id async for group in cursor for _id in group["ids"][1:]]
+        if extra_ids:
+            await collection.delete_many({"_id": {"$in": extra_ids}})
+
+    async def save_to_watchlist(self, symbol: str) -> None:
+        """
+        Saves a single ticker symbol to the watchlist.
+        """
+        await self._save_symbols(self._WATCHLIST, [symbol])
+
+    async def save_many_to_watchlist(self, symbols: Iterable[str]) -> None:
+        """
+        Saves ticker symbols to the watchlist in one round trip.
+        """
+        await self._save_symbols(self._WATCHLIST, symbols)
+
+    async def remove_from_watchlist(self, symbol: str) -> None:
+        """
+        Removes a single ticker symbol from the watchlist.
+        """
+        await self._remove_symbols(self._WATCHLIST, [symbol])
+
+    async def remove_many_from_watchlist(self, symbols: Iterable[str]) -> None:
+        """
+        Removes ticker symbols from the watchlist in one round trip.
+        """
+        await self._remove_symbols(self._WATCHLIST, symbols)
+
+    async def replace_watchlist(self, symbols: Iterable[str]) -> None:
+        """
+        Makes the watchlist contain exactly the given ticker symbols.
+        """
+        await self._replace_symbols(self._WATCHLIST, symbols)
+
+    async def get_watchlist(self) -> list[str]:
+        """
+        Returns a list of ticker symbols saved in the watchlist.
+        """
+        return await self._get_symbols(self._WATCHLIST)
+
+    async def save_to_holdings(self, symbol: str) -> None:
+        """
+        Saves a single ticker symbol to the holding's collection.
+        """
+        await self._save_symbols(self._HOLDINGS, [symbol])
+
+    async def save_many_to_holdings(self, symbols: Iterable[str]) -> None:
+        """
+        Saves ticker symbols to the holding's collection in one round trip.
+        """
+        await self._save_symbols(self._HOLDINGS, symbols)
+
+    async def remove_from_holdings(self, symbol: str) -> None:
+        """
+        Removes a single ticker symbol from the holding's collection.
+        """
+        await self._remove_symbols(self._HOLDINGS, [symbol])
+
+    async def remove_many_from_holdings(self, symbols: Iterable[str]) -> None:
+        """
+        Removes ticker symbols from the holding's collection in one round trip.
+        """
+        await self._remove_symbols(self._HOLDINGS, symbols)
+
+    async def replace_holdings(self, symbols: Iterable[str]) -> None:
+        """
+        Makes the holding's collection contain exactly the given ticker symbols.
+        """
+        await self._replace_symbols(self._HOLDINGS, symbols)
+
+    async def get_holdings(self) -> list[str]:
+        """
+        Returns a list of ticker symbols saved in the holding's collection.
+        """
+        return await self._get_symbols(self._HOLDINGS)
+
+    async def _save_symbols(self, collection: str, symbols: Iterable[str]) -> None:
+        await self.ensure_indexes()
+        operations = [
+            UpdateOne(
+                {"symbol": symbol}, {"$setOnInsert": {"symbol": symbol}}, upsert=True
+            )
+            for symbol in dict.fromkeys(symbols)
+        ]
+        if operations:
+            await self.db[collection].bulk_write(operations, ordered=False)
+
+    async def _remove_symbols(self, collection: str, symbols: Iterable[str]) -> None:
+        await self.db[collection].delete_many({"symbol": {"$in": list(symbols)}})
+
+    async def _replace_symbols(self, collection: str, symbols: Iterable[str]) -> None:
+        symbols = list(symbols)
+        await self.db[collection].delete_many({"symbol": {"$nin": symbols}})
+        await self._save_symbols(collection, symbols)
+
+    async def _get_symbols(self, collection: str) -> list[str]:
+        cursor = self.db[collection].find({}, {"_id": False, "symbol": True})
+        return [doc["symbol"] async for doc in cursor]
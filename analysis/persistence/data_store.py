@@ -1,59 +1,176 @@
 import os
+import threading
 from datetime import datetime
+from typing import Iterable, Optional
 
-from pymongo import MongoClient
+from pymongo import ASCENDING, MongoClient, UpdateOne
+from pymongo.synchronous.collection import Collection
 from pymongo.synchronous.database import Database
 
 
 class DataStore:
+    """
+    Watchlist and holdings persisted in MongoDB, one document per symbol.
+
+    Every instance shares a single MongoClient and its connection pool, so
+    constructing a DataStore on each Streamlit rerun is cheap. Indexes are
+    created once per process.
+    """
+
     db: Database
 
     _WATCHLIST = "watchlist"
     _HOLDINGS = "holdings"
 
+    _client: Optional[MongoClient] = None
+    _indexed: set[str] = set()
+    _lock = threading.Lock()
+
     def __init__(self) -> None:
-        client: MongoClient = MongoClient(os.environ["MONGO_URI"])
+        client = DataStore._get_client()
         self.db = client.get_database(os.environ["MONGO_DB_NAME"])
+        self.ensure_indexes()
+
+    @staticmethod
+    def _get_client() -> MongoClient:
+        """
+        Returns the process-wide client, creating it on first use.
+        """
+        with DataStore._lock:
+            if DataStore._client is None:
+                DataStore._client = MongoClient(os.environ["MONGO_URI"])
+            return DataStore._client
+
+    @staticmethod
+    def close() -> None:
+        """
+        Closes the process-wide client and its pooled connections.
+        """
+        with DataStore._lock:
+            if DataStore._client is not None:
+                DataStore._client.close()
+                DataStore._client = None
+                DataStore._indexed.clear()
+
+    def ensure_indexes(self) -> None:
+        """
+        Creates a unique index on symbol for the watchlist and holdings, removing
+        any duplicate entries saved before the index existed.
+        """
+        with DataStore._lock:
+            if self.db.name in DataStore._indexed:
+                return
+            for name in (self._WATCHLIST, self._HOLDINGS):
+                DataStore._remove_duplicates(self.db[name])
+                self.db[name].create_index([("symbol", ASCENDING)], unique=True)
+            DataStore._indexed.add(self.db.name)
+
+    @staticmethod
+    def _remove_duplicates(collection: Collection) -> None:
+        duplicates = collection.aggregate(
+            [
+                {"$group": {"_id": "$symbol", "ids": {"$push": "$_id"}}},
+                {"$match": {"ids.1": {"$exists": True}}},
+            ]
+        )
+        extra_ids = [_id for group in duplicates for _id in group["ids"][1:]]
+        if extra_ids:
+            collection.delete_many({"_id": {"$in": extra_ids}})
 
     def save_to_watchlist(self, symbol: str) -> None:
         """
         Saves a single ticker symbol to the watchlist.
         """
-        document = {"symbol": symbol}
-        self.db[self._WATCHLIST].insert_one(document)
+        self._save_symbols(self._WATCHLIST, [symbol])
+
+    def save_many_to_watchlist(self, symbols: Iterable[str]) -> None:
+        """
+        Saves ticker symbols to the watchlist in one round trip.
+        """
+        self._save_symbols(self._WATCHLIST, symbols)
 
     def remove_from_watchlist(self, symbol: str) -> None:
         """
         Removes a single ticker symbol from the watchlist.
         """
-        document = {"symbol": symbol}
-        self.db[self._WATCHLIST].delete_one(document)
+        self._remove_symbols(self._WATCHLIST, [symbol])
+
+    def remove_many_from_watchlist(self, symbols: Iterable[str]) -> None:
+        """
+        Removes ticker symbols from the watchlist in one round trip.
+        """
+        self._remove_symbols(self._WATCHLIST, symbols)
+
+    def replace_watchlist(self, symbols: Iterable[str]) -> None:
+        """
+        Makes the watchlist contain exactly the given ticker symbols.
+        """
+        self._replace_symbols(self._WATCHLIST, symbols)
 
     def get_watchlist(self) -> list[str]:
         """
         Returns a list of ticker symbols saved in the watchlist.
         """
-        return [doc["symbol"] for doc in self.db[self._WATCHLIST].find()]
+        return self._get_symbols(self._WATCHLIST)
 
     def save_to_holdings(self, symbol: str) -> None:
         """
         Saves a single ticker symbol to the holding's collection.
         """
-        document = {"symbol": symbol}
-        self.db[self._HOLDINGS].insert_one(document)
+        self._save_symbols(self._HOLDINGS, [symbol])
+
+    def save_many_to_holdings(self, symbols: Iterable[str]) -> None:
+        """
+        Saves ticker symbols to the holding's collection in one round trip.
+        """
+        self._save_symbols(self._HOLDINGS, symbols)
 
     def remove_from_holdings(self, symbol: str) -> None:
         """
         Removes a single ticker symbol from the holding's collection.
         """
-        document = {"symbol": symbol}
-        self.db[self._HOLDINGS].delete_one(document)
+        self._remove_symbols(self._HOLDINGS, [symbol])
+
+    def remove_many_from_holdings(self, symbols: Iterable[str]) -> None:
+        """
+        Removes ticker symbols from the holding's collection in one round trip.
+        """
+        self._remove_symbols(self._HOLDINGS, symbols)
+
+    def replace_holdings(self, symbols: Iterable[str]) -> None:
+        """
+        Makes the holding's collection contain exactly the given ticker symbols.
+        """
+        self._replace_symbols(self._HOLDINGS, symbols)
 
     def get_holdings(self) -> list[str]:
         """
         Returns a list of ticker symbols saved in the holding's collection.
         """
-        return [doc["symbol"] for doc in self.db[self._HOLDINGS].find()]
+        return self._get_symbols(self._HOLDINGS)
+
+    def _save_symbols(self, collection: str, symbols: Iterable[str]) -> None:
+        # Upserts keep saving idempotent now that symbols are unique.
+        operations = [
+            UpdateOne(
+                {"symbol": symbol}, {"$setOnInsert": {"symbol": symbol}}, upsert=True
+            )
+            for symbol in dict.fromkeys(symbols)
+        ]
+        if operations:
+            self.db[collection].bulk_write(operations, ordered=False)
+
+    def _remove_symbols(self, collection: str, symbols: Iterable[str]) -> None:
+        self.db[collection].delete_many({"symbol": {"$in": list(symbols)}})
+
+    def _replace_symbols(self, collection: str, symbols: Iterable[str]) -> None:
+        symbols = list(symbols)
+        self.db[collection].delete_many({"symbol": {"$nin": symbols}})
+        self._save_symbols(collection, symbols)
+
+    def _get_symbols(self, collection: str) -> list[str]:
+        cursor = self.db[collection].find({}, {"_id": False, "symbol": True})
+        return [doc["symbol"] for doc in cursor]
 
     @staticmethod
     def get_date() -> str:
@@ -0,0 +1,34 @@
+import os
+from typing import Optional, Self, cast
+
+from pymongo.asynchronous.database import AsyncDatabase
+
+from analysis.persistence.async_data_store import AsyncDataStore
+
+
+class MongoStore:
+    """
+    Base class of the stores kept in the app's MongoDB database. Stores use the
+    running loop's AsyncDataStore client, and each has one process-wide instance.
+    """
+
+    _defaults: dict[type["MongoStore"], "MongoStore"] = {}
+
+    @classmethod
+    def get_default(cls) -> Optional[Self]:
+        """
+        Returns the process-wide store, creating it on first use, or None if
+        MongoDB isn't configured.
+        """
+        if "MONGO_URI" not in os.environ:
+            return None
+        if cls not in MongoStore._defaults:
+            MongoStore._defaults[cls] = cls()
+        return cast(Self, MongoStore._defaults[cls])
+
+    @property
+    def db(self) -> AsyncDatabase:
+        """
+        Returns the database on the running loop's client.
+        """
+        return AsyncDataStore().db
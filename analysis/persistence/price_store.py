@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from analysis.api.company_api import CompanyAPI
+
+
+class PriceStore:
+    """
+    Local store of daily price bars, one memory-mapped NumPy file per symbol.
+
+    Bars are kept in ascending date order as a structured array holding every
+    field of the API's daily chart. Only bars newer
+    than the last stored date are fetched, unless the provider has restated
+    history (e.g. after a split or dividend adjustment), in which case the full
+    history is fetched and the file rewritten.
+    """
+
+    # Fields of a daily bar in the order the API returns them. Prices are floats,
+    # so missing ones are NaN, and missing volumes are 0. Labels longer than 32
+    # characters are truncated.
+    DTYPE = np.dtype(
+        [
+            ("date", "datetime64[D]"),
+            ("open", "float64"),
+            ("high", "float64"),
+            ("low", "float64"),
+            ("close", "float64"),
+            ("adjClose", "float64"),
+            ("volume", "int64"),
+            ("unadjustedVolume", "int64"),
+            ("change", "float64"),
+            ("changePercent", "float64"),
+            ("vwap", "float64"),
+            ("label", "U32"),
+            ("changeOverTime", "float64"),
+        ]
+    )
+    # Numeric fields, compared and converted one by one.
+    COLUMNS = (
+        "open",
+        "high",
+        "low",
+        "close",
+        "adjClose",
+        "volume",
+        "unadjustedVolume",
+        "change",
+        "changePercent",
+        "vwap",
+        "changeOverTime",
+    )
+
+    _DEFAULT_PATH = os.path.join(".cache", "prices")
+
+    # Minimum number of seconds between checks for new bars.
+    _REFRESH_INTERVAL = 60 * 60
+
+    # Columns compared on the overlapping bar to detect restated history.
+    _RESTATEMENT_COLUMNS = ("close", "adjClose")
+
+    _default: Optional["PriceStore"] = None
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.environ.get("PRICE_STORE_PATH") or self._DEFAULT_PATH
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def get_default() -> "PriceStore":
+        """
+        Returns the process-wide store, creating it on first use.
+        """
+        if PriceStore._default is None:
+            PriceStore._default = PriceStore()
+        return PriceStore._default
+
+    def contains(self, symbol: str) -> bool:
+        """
+        Returns whether any bars are stored for a symbol.
+        """
+        return os.path.exists(self._bars_path(symbol))
+
+    def read(self, symbol: str) -> Optional[np.ndarray]:
+        """
+        Returns the stored bars for a symbol as a read-only memory-mapped array.
+        Files written with a different layout are treated as missing, so they are
+        fetched again.
+        """
+        if not self.contains(symbol):
+            return None
+        bars = np.load(self._bars_path(symbol), mmap_mode="r")
+        return bars if bars.dtype == PriceStore.DTYPE else None
+
+    def write(self, symbol: str, bars: np.ndarray) -> None:
+        """
+        Atomically replaces the stored bars for a symbol.
+        """
+        path = self._bars_path(symbol)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, bars)
+        os.replace(tmp_path, path)
+
+    async def get_daily_chart(
+        self,
+        symbol: str,
+        days: Optional[int] = None,
+        columns: Optional[Iterable[str]] = None,
+        refresh: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Brings the stored bars up to date and returns them newest first, in the
+        same layout as CompanyAPI.get_daily_chart.
+
+        :param symbol: Ticker symbol
+        :param days: Number of most recent days to return, defaults to all of them
+        :param columns: Columns to keep, defaults to all of them
+        :param refresh: Check for new bars even if the symbol was checked recently
+        """
+        await self.sync(symbol, refresh)
+        bars = self.read(symbol)
+        if bars is None:
+            return pd.DataFrame()
+        return PriceStore.to_frame(bars, days, columns)
+
+    async def sync(self, symbol: str, refresh: bool = False) -> None:
+        """
+        Fetches bars newer than the last stored date, rewriting the full history
+        if the overlapping bar no longer matches what is stored. Unless refresh
+        is set, a symbol is only checked once per refresh interval.
+        """
+        bars = self.read(symbol)
+        if (
+            bars is not None
+            and len(bars) > 0
+            and not refresh
+            and not self._is_due(symbol)
+        ):
+            return
+
+        if bars is None or len(bars) == 0:
+            self.write(symbol, await PriceStore._fetch(symbol))
+        else:
+            last = bars[-1]
+            fetched = await PriceStore._fetch(symbol, str(last["date"]))
+            overlap = fetched[fetched["date"] == last["date"]]
+            if len(overlap) == 0 or PriceStore._is_restated(last, overlap[0]):
+                self.write(symbol, await PriceStore._fetch(symbol))
+            else:
+                newer = fetched[fetched["date"] > last["date"]]
+                if len(newer) > 0:
+                    self.write(symbol, np.concatenate([bars, newer]))
+
+        self._mark_checked(symbol)
+
+    @staticmethod
+    async def _fetch(symbol: str, from_date: Optional[str] = None) -> np.ndarray:
+        # The response cache would hide bars published since it was stored.
+        daily_chart = await CompanyAPI.get_daily_chart(
+            symbol, from_date=from_date, use_cache=False
+        )
+        return PriceStore.to_bars(daily_chart)
+
+    @staticmethod
+    def _is_restated(stored: np.void, fetched: np.void) -> bool:
+        return any(
+            not np.isclose(stored[column], fetched[column], rtol=1e-6, equal_nan=True)
+            for column in PriceStore._RESTATEMENT_COLUMNS
+        )
+
+    @staticmethod
+    def to_bars(daily_chart: pd.DataFrame) -> np.ndarray:
+        """
+        Converts a daily chart from the API into a structured array sorted by date.
+        """
+        if len(daily_chart) == 0:
+            return np.empty(0, dtype=PriceStore.DTYPE)
+
+        fields = {
+            "date": pd.to_datetime(daily_chart["date"]).to_numpy("datetime64[D]"),
+            "label": (
+                daily_chart["label"].fillna("").astype(str).to_numpy()
+                if "label" in daily_chart
+                else np.full(len(daily_chart), "")
+            ),
+        }
+        for column in PriceStore.COLUMNS:
+            missing = np.nan if PriceStore.DTYPE[column].kind == "f" else 0
+            fields[column] = (
+                daily_chart[column].fillna(missing).to_numpy(PriceStore.DTYPE[column])
+                if column in daily_chart
+                else np.full(len(daily_chart), missing)
+            )
+        names = PriceStore.DTYPE.names or ()
+        bars = np.rec.fromarrays(
+            [fields[name] for name in names], dtype=PriceStore.DTYPE
+        ).view(np.ndarray)
+        bars.sort(order="date")
+        return bars
+
+    @staticmethod
+    def to_frame(
+        bars: np.ndarray,
+        days: Optional[int] = None,
+        columns: Optional[Iterable[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Builds a newest-first daily chart from stored bars, with dates and labels
+        as strings like the API's. Only the requested days and columns are read
+        from the memory-mapped file and copied into the frame.
+        """
+        newest_first = bars[::-1]
+        if days is not None:
+            newest_first = newest_first[:days]
+        names = bars.dtype.names or ()
+        if columns is not None:
+            wanted = set(columns)
+            names = tuple(name for name in names if name in wanted)
+
+        data = {}
+        for name in names:
+            if name == "date":
+                dates = np.datetime_as_string(newest_first["date"], unit="D")
+                data[name] = dates.astype(object)
+            elif name == "label":
+                data[name] = newest_first["label"].astype(object)
+            else:
+                data[name] = np.array(newest_first[name])
+        return pd.DataFrame(data)
+
+    def _is_due(self, symbol: str) -> bool:
+        try:
+            checked_at = os.path.getmtime(self._checked_path(symbol))
+        except FileNotFoundError:
+            return True
+        return time.time() - checked_at > self._REFRESH_INTERVAL
+
+    def _mark_checked(self, symbol: str) -> None:
+        with open(self._checked_path(symbol), "a"):
+            os.utime(self._checked_path(symbol))
+
+    def _bars_path(self, symbol: str) -> str:
+        return os.path.join(self.path, f"{symbol.upper()}.npy")
+
+    def _checked_path(self, symbol: str) -> str:
+        return os.path.join(self.path, f"{symbol.upper()}.checked")
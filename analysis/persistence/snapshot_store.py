@@ -0,0 +1,220 @@
+import asyncio
+import datetime
+import json
+import os
+import socket
+import uuid
+import zlib
+from typing import Any, Awaitable, Callable, Optional
+
+import pandas as pd
+import pyarrow as pa
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from analysis.persistence.mongo_store import MongoStore
+
+
+class SnapshotStore(MongoStore):
+    """
+    Company datasets shared through MongoDB by every app replica, one document
+    per (symbol, dataset). DataFrames are stored as compressed Arrow IPC streams
+    and dicts as zlib-compressed JSON.
+
+    Snapshots expire through a TTL index. When a snapshot is missing, the replica
+    that takes the lease for it fetches from the API while the others wait for the
+    snapshot to appear, so concurrent misses result in a single fetch.
+    """
+
+    _SNAPSHOTS = "company_snapshots"
+    _LEASES = "company_snapshot_leases"
+
+    # Seconds a snapshot stays fresh, per dataset. Statements are left out since
+    # StatementStore already shares them through MongoDB.
+    TTLS = {
+        "daily_chart": 60 * 60,
+        "daily_shares": 24 * 60 * 60,
+        "ratios": 7 * 24 * 60 * 60,
+        "quote": 60,
+        "profile": 24 * 60 * 60,
+        "estimates": 24 * 60 * 60,
+    }
+
+    # Seconds a replica may hold a lease before others assume it has failed.
+    _LEASE_SECONDS = 30.0
+
+    # Seconds between checks for a snapshot being written by another replica.
+    _POLL_INTERVAL = 0.25
+
+    _indexed: set[str] = set()
+
+    def __init__(self) -> None:
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the snapshot lookup index and the TTL indexes that remove expired
+        snapshots and abandoned leases.
+        """
+        db = self.db
+        if db.name in SnapshotStore._indexed:
+            return
+        await db[self._SNAPSHOTS].create_index(
+            [("symbol", ASCENDING), ("field", ASCENDING)], unique=True
+        )
+        for collection in (self._SNAPSHOTS, self._LEASES):
+            await db[collection].create_index("expires_at", expireAfterSeconds=0)
+        SnapshotStore._indexed.add(db.name)
+
+    async def load(
+        self,
+        symbol: str,
+        field: str,
+        fetch: Callable[[], Awaitable[Any]],
+        refresh: bool = False,
+    ) -> Any:
+        """
+        Returns a fresh snapshot of a dataset, fetching and storing it if there
+        isn't one.
+
+        :param symbol: Ticker symbol
+        :param field: Dataset name, one of SnapshotStore.TTLS
+        :param fetch: Loads the dataset from the API
+        :param refresh: Fetch and store the dataset even if there is a snapshot
+        """
+        await self.ensure_indexes()
+        if not refresh:
+            snapshot = await self.get(symbol, field)
+            if snapshot is not None:
+                return snapshot
+
+        key = f"{symbol}:{field}"
+        deadline = asyncio.get_running_loop().time() + self._LEASE_SECONDS
+        while True:
+            if await self._acquire_lease(key):
+                try:
+                    value = await fetch()
+                    try:
+                        await self.put(symbol, field, value)
+                    except (pa.ArrowException, TypeError):
+                        # Columns of mixed types can't be snapshotted; serve the
+                        # fetched value regardless.
+                        pass
+                    return value
+                finally:
+                    await self._release_lease(key)
+
+            await asyncio.sleep(self._POLL_INTERVAL)
+            snapshot = await self.get(symbol, field)
+            if snapshot is not None:
+                return snapshot
+            if asyncio.get_running_loop().time() > deadline:
+                # The lease holder is stuck; don't keep the page waiting on it.
+                return await fetch()
+
+    async def get(self, symbol: str, field: str) -> Optional[Any]:
+        """
+        Returns a dataset's snapshot, or None if there isn't a fresh one.
+        """
+        document = await self.db[self._SNAPSHOTS].find_one(
+            {
+                "symbol": symbol,
+                "field": field,
+                "expires_at": {"$gt": SnapshotStore._now()},
+            },
+            {"data": True},
+        )
+        if document is None:
+            return None
+        return SnapshotStore.decode(document["data"])
+
+    async def put(
+        self, symbol: str, field: str, value: Any, ttl: Optional[float] = None
+    ) -> bool:
+        """
+        Stores a dataset's snapshot, replacing any previous one.
+
+        :param ttl: Seconds the snapshot stays fresh, defaults to the dataset's
+            entry in SnapshotStore.TTLS
+        :return: Whether the stored data differs from the previous snapshot's
+        """
+        now = SnapshotStore._now()
+        ttl = ttl if ttl is not None else self.TTLS[field]
+        data = SnapshotStore.encode(value)
+        previous = await self.db[self._SNAPSHOTS].find_one_and_update(
+            {"symbol": symbol, "field": field},
+            {
+                "$set": {
+                    "data": data,
+                    "created_at": now,
+                    "expires_at": now + datetime.timedelta(seconds=ttl),
+                }
+            },
+            projection={"data": True},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+        return previous is None or previous["data"] != data
+
+    async def invalidate(self, symbol: str, field: Optional[str] = None) -> None:
+        """
+        Removes a symbol's snapshot of one dataset, or of every dataset.
+        """
+        query = {"symbol": symbol}
+        if field is not None:
+            query["field"] = field
+        await self.db[self._SNAPSHOTS].delete_many(query)
+
+    async def _acquire_lease(self, key: str) -> bool:
+        """
+        Takes the lease for a key unless another replica holds an unexpired one.
+        """
+        now = SnapshotStore._now()
+        try:
+            await self.db[self._LEASES].find_one_and_update(
+                {"_id": key, "expires_at": {"$lte": now}},
+                {
+                    "$set": {
+                        "owner": self.owner,
+                        "expires_at": now
+                        + datetime.timedelta(seconds=self._LEASE_SECONDS),
+                    }
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def _release_lease(self, key: str) -> None:
+        await self.db[self._LEASES].delete_one({"_id": key, "owner": self.owner})
+
+    @staticmethod
+    def encode(value: Any) -> bytes:
+        """
+        Serializes a DataFrame as a zstd-compressed Arrow IPC stream, prefixed
+        with b"A", or anything else as zlib-compressed JSON, prefixed with b"J".
+        """
+        if isinstance(value, pd.DataFrame):
+            table = pa.Table.from_pandas(value, preserve_index=False)
+            sink = pa.BufferOutputStream()
+            options = pa.ipc.IpcWriteOptions(compression="zstd")
+            with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+            return b"A" + sink.getvalue().to_pybytes()
+        return b"J" + zlib.compress(json.dumps(value).encode())
+
+    @staticmethod
+    def decode(data: bytes) -> Any:
+        """
+        Deserializes a value written by SnapshotStore.encode.
+        """
+        if data[:1] == b"A":
+            with pa.ipc.open_stream(pa.py_buffer(data[1:])) as reader:
+                return reader.read_all().to_pandas(date_as_object=False)
+        return json.loads(zlib.decompress(data[1:]))
+
+    @staticmethod
+    def _now() -> datetime.datetime:
+        # TTL indexes compare against UTC; stored datetimes are naive UTC.
+        return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,213 @@
+import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+import pandas as pd
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from analysis.api.company_api import CompanyAPI
+from analysis.models.statement import StatementPeriod
+from analysis.persistence.mongo_store import MongoStore
+
+
+class StatementStore(MongoStore):
+    """
+    Financial statements persisted in MongoDB, one document per
+    (symbol, period, date). The statement period is stored as periodType since
+    FMP already uses period for the fiscal quarter (e.g. "Q1").
+
+    Statements are only fetched from the API when a new filing is due, and only
+    filings newer than the latest stored one are written.
+    """
+
+    _COLLECTIONS = {
+        "balance_sheet": "balance_sheet_statements",
+        "income": "income_statements",
+        "cashflow": "cash_flow_statements",
+    }
+    _SYNC = "statement_sync"
+
+    FETCHERS: dict[str, Callable[..., Awaitable[pd.DataFrame]]] = {
+        "balance_sheet": CompanyAPI.get_balance_sheet_statements,
+        "income": CompanyAPI.get_income_statements,
+        "cashflow": CompanyAPI.get_cash_flow_statements,
+    }
+
+    # Number of days after the latest statement date before the next one ends.
+    _PERIOD_DAYS = {StatementPeriod.QUARTER: 91, StatementPeriod.ANNUAL: 365}
+
+    # Minimum time between API checks once a filing is due.
+    _CHECK_INTERVAL = datetime.timedelta(days=1)
+
+    # Number of statements requested when the store already has history.
+    _INCREMENTAL_LIMIT = 4
+
+    # Number of statements returned to callers.
+    HISTORY = 16
+
+    _indexed: set[str] = set()
+
+    async def ensure_indexes(self) -> None:
+        """
+        Creates the indexes used for upserts and most-recent-first reads.
+        """
+        db = self.db
+        if db.name in StatementStore._indexed:
+            return
+        for collection in self._COLLECTIONS.values():
+            await db[collection].create_index(
+                [
+                    ("symbol", ASCENDING),
+                    ("periodType", ASCENDING),
+                    ("date", DESCENDING),
+                ],
+                unique=True,
+            )
+        await db[self._SYNC].create_index(
+            [("symbol", ASCENDING), ("kind", ASCENDING), ("periodType", ASCENDING)],
+            unique=True,
+        )
+        StatementStore._indexed.add(db.name)
+
+    async def load(
+        self,
+        symbol: str,
+        kind: str,
+        period: StatementPeriod = StatementPeriod.QUARTER,
+        refresh: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Returns the most recent statements of a kind, syncing new filings first.
+
+        :param symbol: Ticker symbol
+        :param kind: One of "balance_sheet", "income" or "cashflow"
+        :param period: Statement period
+        :param refresh: Check for new filings even if none is due
+        :return: Statements, most recent first
+        """
+        await self.sync(symbol, kind, period, refresh)
+        statements = await self.get_statements(symbol, kind, period, self.HISTORY)
+        return pd.DataFrame(statements)
+
+    async def sync(
+        self,
+        symbol: str,
+        kind: str,
+        period: StatementPeriod = StatementPeriod.QUARTER,
+        refresh: bool = False,
+    ) -> int:
+        """
+        Fetches and stores statements newer than the latest stored one, if a new
+        filing is due or refresh is set. Statements are fetched past the response
+        cache, which could otherwise hide a filing for as long as it keeps the
+        old response.
+
+        :return: Number of statements written
+        """
+        await self.ensure_indexes()
+        latest, checked_at = await self._get_sync_state(symbol, kind, period)
+        if not refresh and not self._is_due(latest, checked_at, period):
+            return 0
+
+        fetch = self.FETCHERS[kind]
+        limit = self._INCREMENTAL_LIMIT if latest else None
+        statements = (await fetch(symbol, period, limit, use_cache=False)).to_dict(
+            "records"
+        )
+
+        newer = [s for s in statements if latest is None or s["date"] > latest]
+        if latest is not None and len(newer) == len(statements) > 0:
+            # Every recent statement is new, so there may be a gap; fill it.
+            statements = (await fetch(symbol, period, None, use_cache=False)).to_dict(
+                "records"
+            )
+            newer = [s for s in statements if s["date"] > latest]
+
+        await self._write(symbol, kind, period, newer)
+        return len(newer)
+
+    async def get_statements(
+        self,
+        symbol: str,
+        kind: str,
+        period: StatementPeriod = StatementPeriod.QUARTER,
+        limit: int = HISTORY,
+    ) -> list[dict]:
+        """
+        Returns stored statements, most recent first.
+        """
+        cursor = (
+            self.db[self._COLLECTIONS[kind]]
+            .find(
+                {"symbol": symbol, "periodType": str(period)},
+                {"_id": False, "periodType": False},
+            )
+            .sort("date", DESCENDING)
+            .limit(limit)
+        )
+        return [statement async for statement in cursor]
+
+    async def _get_sync_state(
+        self, symbol: str, kind: str, period: StatementPeriod
+    ) -> tuple[Optional[str], Optional[datetime.datetime]]:
+        latest = await self.db[self._COLLECTIONS[kind]].find_one(
+            {"symbol": symbol, "periodType": str(period)},
+            {"date": True},
+            sort=[("date", DESCENDING)],
+        )
+        state = await self.db[self._SYNC].find_one(
+            {"symbol": symbol, "kind": kind, "periodType": str(period)}
+        )
+        return (
+            latest["date"] if latest else None,
+            state["checked_at"] if state else None,
+        )
+
+    def _is_due(
+        self,
+        latest: Optional[str],
+        checked_at: Optional[datetime.datetime],
+        period: StatementPeriod,
+    ) -> bool:
+        """
+        A filing is due once the period after the latest stored statement has
+        ended. Until it arrives, the API is checked at most once per interval.
+        """
+        if latest is not None:
+            period_end = datetime.date.fromisoformat(latest) + datetime.timedelta(
+                days=self._PERIOD_DAYS[period]
+            )
+            if datetime.date.today() < period_end:
+                return False
+        return checked_at is None or not self._checked_recently(checked_at)
+
+    def _checked_recently(self, checked_at: datetime.datetime) -> bool:
+        return datetime.datetime.now() - checked_at < self._CHECK_INTERVAL
+
+    async def _write(
+        self,
+        symbol: str,
+        kind: str,
+        period: StatementPeriod,
+        statements: list[dict[str, Any]],
+    ) -> None:
+        if statements:
+            await self.db[self._COLLECTIONS[kind]].bulk_write(
+                [
+                    UpdateOne(
+                        {
+                            "symbol": symbol,
+                            "periodType": str(period),
+                            "date": statement["date"],
+                        },
+                        {"$set": {**statement, "symbol": symbol}},
+                        upsert=True,
+                    )
+                    for statement in statements
+                ],
+                ordered=False,
+            )
+        await self.db[self._SYNC].update_one(
+            {"symbol": symbol, "kind": kind, "periodType": str(period)},
+            {"$set": {"checked_at": datetime.datetime.now()}},
+            upsert=True,
+        )
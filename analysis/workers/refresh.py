@@ -0,0 +1,317 @@
+"""
+Keeps the datasets of watched and held symbols warm in the shared stores.
+
+Usage: python -m analysis.workers.refresh [--once]
+"""
+
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+from typing import Any, Optional
+from zoneinfo import ZoneInfo
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING
+
+from analysis.api.base_api import BaseAPI
+from analysis.models.company import Company
+from analysis.persistence.async_data_store import AsyncDataStore
+from analysis.persistence.snapshot_store import SnapshotStore
+from analysis.persistence.statement_store import StatementStore
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshWorker:
+    """
+    Refreshes every dataset of the watched and held symbols on its own cadence,
+    so pages read them from the snapshot and statement stores instead of waiting
+    on the API.
+
+    - Quotes every few minutes while the market is open, and once at the close.
+    - Prices once each trading day, after the close has settled.
+    - Statements daily around the earnings date in the quote, weekly otherwise.
+    - Everything else daily.
+
+    When each dataset was last checked is recorded per symbol and drives the
+    schedule, along with when its data last changed. Market holidays aren't
+    accounted for, so a few refreshes on those days are wasted.
+    """
+
+    _STATE = "refresh_state"
+
+    # Seconds between passes over the watched symbols.
+    TICK = 60
+
+    # Longest wait between passes while they keep failing, e.g. with MongoDB down.
+    MAX_BACKOFF = 15 * 60
+
+    # Number of symbols refreshed at once.
+    CONCURRENCY = 8
+
+    _MARKET_TZ = ZoneInfo("America/New_York")
+    _MARKET_OPEN = datetime.time(9, 30)
+    _MARKET_CLOSE = datetime.time(16, 0)
+
+    # Time after the close before the day's bars are considered final.
+    _SETTLE = datetime.timedelta(minutes=30)
+
+    QUOTE_INTERVAL = datetime.timedelta(minutes=5)
+    DAILY_INTERVAL = datetime.timedelta(days=1)
+    STATEMENT_INTERVAL = datetime.timedelta(days=7)
+
+    # Statements are checked daily from this long before an earnings date until
+    # this long after it.
+    _EARNINGS_BEFORE = datetime.timedelta(days=1)
+    _EARNINGS_AFTER = datetime.timedelta(days=14)
+
+    def __init__(self) -> None:
+        self.snapshots = SnapshotStore()
+        self.statements = StatementStore.get_default()
+        self.refreshed = 0
+        self.changed = 0
+        self.failed = 0
+
+    async def run_forever(self) -> None:
+        """
+        Refreshes due datasets every tick until cancelled. A failed pass is
+        logged, and the wait before the next one doubles with each consecutive
+        failure, up to MAX_BACKOFF.
+        """
+        failures = 0
+        while True:
+            try:
+                await self.run_once()
+                failures = 0
+            except Exception:
+                failures += 1
+                logger.exception("Refresh pass failed (%d in a row)", failures)
+            await asyncio.sleep(min(self.TICK * 2**failures, self.MAX_BACKOFF))
+
+    async def run_once(self) -> None:
+        """
+        Refreshes every due dataset of the watched and held symbols once.
+        """
+        store = AsyncDataStore()
+        await store.db[self._STATE].create_index(
+            [("symbol", ASCENDING), ("field", ASCENDING)], unique=True
+        )
+        watchlist, holdings = await asyncio.gather(
+            store.get_watchlist(), store.get_holdings()
+        )
+        symbols = list(dict.fromkeys(watchlist + holdings))
+        state = await RefreshWorker._get_state_times(symbols, "checked_at")
+
+        semaphore = asyncio.Semaphore(self.CONCURRENCY)
+
+        async def refresh(symbol: str) -> None:
+            async with semaphore:
+                try:
+                    await self.refresh_symbol(symbol, state.get(symbol, {}))
+                except Exception:
+                    self.failed += 1
+                    logger.exception("Failed to refresh %s", symbol)
+
+        await asyncio.gather(*(refresh(symbol) for symbol in symbols))
+
+    async def refresh_symbol(
+        self, symbol: str, checked: dict[str, datetime.datetime]
+    ) -> None:
+        """
+        Refreshes a symbol's due datasets. The quote goes first since statements
+        are scheduled around the earnings date it carries.
+
+        :param checked: When each dataset was last checked
+        """
+        now = RefreshWorker._now()
+        quote = None
+        if self._is_due("quote", checked.get("quote"), now, None):
+            quote = await self._refresh(symbol, "quote", now, None)
+        try:
+            if quote is None:
+                quote = await self.snapshots.get(symbol, "quote")
+            earnings = RefreshWorker._get_earnings_date(quote)
+        except Exception:
+            # Statements fall back to their regular schedule.
+            logger.exception("Failed to read the earnings date of %s", symbol)
+            earnings = None
+
+        fields = [
+            field
+            for field in Company.FIELDS
+            if field != "quote"
+            and (field in SnapshotStore.TTLS or self.statements is not None)
+            and self._is_due(field, checked.get(field), now, earnings)
+        ]
+        await asyncio.gather(
+            *(self._refresh(symbol, field, now, earnings) for field in fields)
+        )
+
+    async def _refresh(
+        self,
+        symbol: str,
+        field: str,
+        now: datetime.datetime,
+        earnings: Optional[datetime.datetime],
+    ) -> Optional[Any]:
+        try:
+            if field in StatementStore.FETCHERS:
+                if self.statements is None:
+                    return None
+                changed = await self.statements.sync(symbol, field) > 0
+                value = None
+            else:
+                value = await Company.get_loaders(symbol)[field]()
+                # Keep the snapshot until shortly after the next refresh is due.
+                next_due = self.get_next_due(field, now, earnings)
+                ttl = (next_due - now).total_seconds() + 2 * self.TICK
+                changed = await self.snapshots.put(symbol, field, value, ttl=ttl)
+
+            times = {"checked_at": now}
+            if changed:
+                times["refreshed_at"] = now
+            state = AsyncDataStore().db[self._STATE]
+            await state.update_one(
+                {"symbol": symbol, "field": field}, {"$set": times}, upsert=True
+            )
+        except Exception:
+            self.failed += 1
+            logger.exception("Failed to refresh %s for %s", field, symbol)
+            return None
+
+        if changed:
+            self.changed += 1
+        self.refreshed += 1
+        return value
+
+    @staticmethod
+    async def get_last_refreshed(
+        symbols: list[str],
+    ) -> dict[str, dict[str, datetime.datetime]]:
+        """
+        Returns when the data of each dataset of the given symbols last changed,
+        in UTC. Datasets that never changed are missing.
+        """
+        return await RefreshWorker._get_state_times(symbols, "refreshed_at")
+
+    @staticmethod
+    async def _get_state_times(
+        symbols: list[str], key: str
+    ) -> dict[str, dict[str, datetime.datetime]]:
+        collection = AsyncDataStore().db[RefreshWorker._STATE]
+        times: dict[str, dict[str, datetime.datetime]] = {}
+        async for document in collection.find(
+            {"symbol": {"$in": symbols}, key: {"$exists": True}},
+            {"_id": False, "symbol": True, "field": True, key: True},
+        ):
+            times.setdefault(document["symbol"], {})[document["field"]] = document[
+                key
+            ].replace(tzinfo=datetime.timezone.utc)
+        return times
+
+    def _is_due(
+        self,
+        field: str,
+        refreshed_at: Optional[datetime.datetime],
+        now: datetime.datetime,
+        earnings: Optional[datetime.datetime],
+    ) -> bool:
+        return refreshed_at is None or now >= self.get_next_due(
+            field, refreshed_at, earnings
+        )
+
+    def get_next_due(
+        self,
+        field: str,
+        refreshed_at: datetime.datetime,
+        earnings: Optional[datetime.datetime],
+    ) -> datetime.datetime:
+        """
+        Returns when a dataset refreshed at the given time is next due.
+        """
+        local = refreshed_at.astimezone(self._MARKET_TZ)
+        if field == "quote":
+            if self._is_market_open(local):
+                close = datetime.datetime.combine(
+                    local.date(), self._MARKET_CLOSE, self._MARKET_TZ
+                )
+                return min(refreshed_at + self.QUOTE_INTERVAL, close)
+            return self._next_session(local, self._MARKET_OPEN, datetime.timedelta())
+        if field == "daily_chart":
+            return self._next_session(local, self._MARKET_CLOSE, self._SETTLE)
+        if field in StatementStore.FETCHERS:
+            if earnings is not None:
+                window_start = earnings - self._EARNINGS_BEFORE
+                window_end = earnings + self._EARNINGS_AFTER
+                if window_start <= refreshed_at < window_end:
+                    return refreshed_at + self.DAILY_INTERVAL
+                if refreshed_at < window_start:
+                    return min(refreshed_at + self.STATEMENT_INTERVAL, window_start)
+            return refreshed_at + self.STATEMENT_INTERVAL
+        return refreshed_at + self.DAILY_INTERVAL
+
+    def _is_market_open(self, local: datetime.datetime) -> bool:
+        return (
+            local.weekday() < 5
+            and self._MARKET_OPEN <= local.time() < self._MARKET_CLOSE
+        )
+
+    def _next_session(
+        self,
+        local: datetime.datetime,
+        time: datetime.time,
+        offset: datetime.timedelta,
+    ) -> datetime.datetime:
+        """
+        Returns the first weekday session time plus offset after a local time.
+        """
+        day = local.date()
+        while True:
+            candidate = datetime.datetime.combine(day, time, self._MARKET_TZ) + offset
+            if day.weekday() < 5 and candidate > local:
+                return candidate
+            day += datetime.timedelta(days=1)
+
+    @staticmethod
+    def _get_earnings_date(quote: Optional[Any]) -> Optional[datetime.datetime]:
+        if not quote or not quote.get("earningsAnnouncement"):
+            return None
+        earnings = datetime.datetime.fromisoformat(quote["earningsAnnouncement"])
+        if earnings.tzinfo is None:
+            earnings = earnings.replace(tzinfo=datetime.timezone.utc)
+        return earnings
+
+    @staticmethod
+    def _now() -> datetime.datetime:
+        return datetime.datetime.now(datetime.timezone.utc)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--once", action="store_true", help="refresh due datasets once and exit"
+    )
+    args = parser.parse_args()
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    if "MONGO_URI" not in os.environ:
+        parser.error("MONGO_URI must be set")
+
+    worker = RefreshWorker()
+    if args.once:
+        BaseAPI.run(worker.run_once())
+        logger.info(
+            "Refreshed %d datasets (%d changed), %d failed",
+            worker.refreshed,
+            worker.changed,
+            worker.failed,
+        )
+    else:
+        BaseAPI.run(worker.run_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compares the previous loop-based cash runway calculation against the vectorized
+one at 16 and 80 quarters of statements, and the batch variant across many
+companies.
+
+Usage: python -m benchmarks.bench_cash_runway
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from analysis.data.company_data import CompanyData
+from analysis.models.company import Company
+
+
+def _loop_cash_runway(company: Company) -> pd.DataFrame:
+    results = []
+
+    min_len = min(len(company.balance_sheet), len(company.cashflow))
+    for idx1 in range(min_len - 3):
+        trailing_free_cashflow = 0
+
+        for idx2 in range(4):
+            trailing_free_cashflow += company.cashflow.iloc[idx1 + idx2]["freeCashFlow"]
+
+        cash = company.balance_sheet.iloc[idx1]["cashAndCashEquivalents"]
+
+        burn_rate = trailing_free_cashflow / 12
+        last_quarter_burn_rate = company.cashflow.iloc[idx1]["freeCashFlow"] / 3
+
+        results.append(
+            {
+                "12 Month Average Runway": cash / burn_rate,
+                "12 Month Burn Rate": burn_rate,
+                "3 Month Average Runway": cash / last_quarter_burn_rate,
+                "3 Month Burn Rate": last_quarter_burn_rate,
+            }
+        )
+
+    return pd.DataFrame(results)
+
+
+def _company(symbol: str, quarters: int, rng: np.random.Generator) -> Company:
+    empty = pd.DataFrame()
+    balance_sheet = pd.DataFrame(
+        {"cashAndCashEquivalents": rng.uniform(1e6, 1e8, quarters)}
+    )
+    cashflow = pd.DataFrame({"freeCashFlow": rng.uniform(-5e6, 5e6, quarters)})
+    return Company(
+        symbol, balance_sheet, empty, cashflow, empty, empty, empty, {}, {}, empty
+    )
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+
+    for quarters in (16, 80):
+        company = _company("SYM", quarters, rng)
+        pd.testing.assert_frame_equal(
+            _loop_cash_runway(company), CompanyData.get_company_cash_runway(company)
+        )
+
+        runs = 200
+        loop = timeit.timeit(lambda: _loop_cash_runway(company), number=runs)
+        vectorized = timeit.timeit(
+            lambda: CompanyData.get_company_cash_runway(company), number=runs
+        )
+        print(
+            f"{quarters:>3} quarters: loop {loop / runs * 1e3:7.3f} ms, "
+            f"vectorized {vectorized / runs * 1e3:7.3f} ms "
+            f"({loop / vectorized:5.1f}x)"
+        )
+
+    companies = [_company(f"SYM{idx}", 16, rng) for idx in range(1_000)]
+    start = timeit.default_timer()
+    batch = CompanyData.get_cash_runway_batch(companies)
+    elapsed = timeit.default_timer() - start
+    for company in companies[:10]:
+        np.testing.assert_allclose(
+            batch.loc[company.symbol].to_numpy(),
+            CompanyData.get_company_cash_runway(company).to_numpy(),
+        )
+    print(f"batch of {len(companies)} companies: {elapsed * 1e3:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compares the daily price chart of a 30-year ticker drawn with every point as SVG
+(the previous behaviour) against the downsampled WebGL chart, by figure JSON
+size and the time to build and serialize the figure.
+
+Usage: python -m benchmarks.bench_charts
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+import plotly.express as px  # type: ignore
+
+from analysis.charts.company_charts import CompanyCharts
+from analysis.models.company import Company
+
+
+def _company(days: int, rng: np.random.Generator) -> Company:
+    empty = pd.DataFrame()
+    dates = pd.bdate_range(end=pd.Timestamp.today(), periods=days)[::-1]
+    prices = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    daily_chart = pd.DataFrame(
+        {"date": dates.strftime("%Y-%m-%d"), "adjClose": prices.round(2)}
+    )
+    return Company("SYM", empty, empty, empty, daily_chart, empty, empty, {}, {}, empty)
+
+
+def _measure(label: str, build) -> None:
+    runs = 10
+    size = len(build().to_json())
+    elapsed = timeit.timeit(lambda: build().to_json(), number=runs) / runs
+    print(
+        f"{label:<14} json={size / 1024:8.1f} KiB build+serialize={elapsed * 1e3:7.1f} ms"
+    )
+
+
+def main() -> None:
+    company = _company(30 * 252, np.random.default_rng(0))
+    print(f"{len(company.daily_chart)} daily bars")
+
+    _measure(
+        "before",
+        lambda: px.line(
+            company.daily_chart, x="date", y="adjClose", title="Closing Prices"
+        ),
+    )
+    for period in ("Max", "5Y", "1Y"):
+        _measure(
+            f"after ({period})",
+            lambda: CompanyCharts.get_daily_chart(company, period),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Reports the memory held by each Company dataset when loaded normally and in
+compact mode, summed over a number of companies.
+
+Usage: python -m benchmarks.bench_company_memory [companies]
+"""
+
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from analysis.api.base_api import BaseAPI
+from analysis.models.company import Company
+from benchmarks.fmp_stub import FMPStub
+
+
+async def _load_many(count: int, compact: bool) -> list[Company]:
+    return [await Company.load(f"SYM{idx}", compact=compact) for idx in range(count)]
+
+
+def _memory_usage(companies: list[Company]) -> pd.Series:
+    return sum(company.get_memory_usage() for company in companies)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    os.environ.setdefault("FMP_API_KEY", "benchmark")
+    os.environ["FMP_CACHE_DISABLED"] = "1"
+    os.environ["PRICE_STORE_PATH"] = tempfile.mkdtemp()
+    BaseAPI.configure_rate_limit(requests_per_minute=1_000_000, burst=1_000)
+
+    with FMPStub() as stub:
+        os.environ["FMP_BASE_URL"] = stub.base_url
+        full = _memory_usage(BaseAPI.run(_load_many(count, compact=False)))
+        compact = _memory_usage(BaseAPI.run(_load_many(count, compact=True)))
+
+    report = pd.DataFrame({"full KiB": full / 1024, "compact KiB": compact / 1024})
+    report.loc["total"] = report.sum()
+    report["ratio"] = report["full KiB"] / report["compact KiB"]
+    print(f"{count} companies")
+    print(report.round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
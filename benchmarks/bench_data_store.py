@@ -0,0 +1,65 @@
+"""
+Compares the MongoDB time spent per watchlist page load with a new client per
+DataStore and full-document reads (the previous behaviour) against the pooled,
+projected DataStore.
+
+Needs a running MongoDB; MONGO_URI is used and a scratch database is created
+and dropped.
+
+Usage: python -m benchmarks.bench_data_store [page_loads]
+"""
+
+import os
+import sys
+import time
+
+from pymongo import MongoClient
+
+from analysis.persistence.data_store import DataStore
+
+_DB_NAME = "bench_data_store"
+_SYMBOLS = [f"SYM{idx}" for idx in range(50)]
+
+
+def _unpooled_page_load() -> None:
+    # The actions module and the watchlist page each built their own client.
+    for _ in range(2):
+        client: MongoClient = MongoClient(os.environ["MONGO_URI"])
+        db = client.get_database(_DB_NAME)
+        [doc["symbol"] for doc in db["watchlist"].find()]
+        [doc["symbol"] for doc in db["holdings"].find()]
+        client.close()
+
+
+def _pooled_page_load() -> None:
+    for _ in range(2):
+        ds = DataStore()
+        ds.get_watchlist()
+        ds.get_holdings()
+
+
+def _measure(label: str, page_load, page_loads: int) -> None:
+    start = time.perf_counter()
+    for _ in range(page_loads):
+        page_load()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} ms/page load={elapsed / page_loads * 1000:8.2f}")
+
+
+def main() -> None:
+    page_loads = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    os.environ["MONGO_DB_NAME"] = _DB_NAME
+
+    ds = DataStore()
+    ds.replace_watchlist(_SYMBOLS)
+    ds.replace_holdings(_SYMBOLS[:10])
+    try:
+        _measure("before", _unpooled_page_load, page_loads)
+        _measure("after", _pooled_page_load, page_loads)
+    finally:
+        DataStore._get_client().drop_database(_DB_NAME)
+        DataStore.close()
+
+
+if __name__ == "__main__":
+    main()
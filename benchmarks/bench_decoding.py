@@ -0,0 +1,73 @@
+"""
+Compares decoding large API responses and building their DataFrames with
+json.loads and pd.DataFrame(records) (the previous behaviour) against
+Decoding.loads and Decoding.to_frame, with every column and with only the
+columns kept in compact mode.
+
+Usage: python -m benchmarks.bench_decoding
+"""
+
+import json
+import timeit
+from typing import Any, Callable
+
+import pandas as pd
+
+from analysis.api.decoding import Decoding, orjson
+from analysis.models.company import Company
+from benchmarks import fmp_stub
+
+# Endpoint, dataset, large response and the path to its records.
+PAYLOADS: list[tuple[str, str, Any, Callable[[Any], list]]] = [
+    (
+        "historical-price-full (30y)",
+        "daily_chart",
+        fmp_stub._daily_chart("SYM", {"timeseries": 30 * 365}),
+        lambda body: body["historical"],
+    ),
+    (
+        "income-statement (30y)",
+        "income",
+        fmp_stub._statements("SYM", {"limit": 120}),
+        lambda body: body,
+    ),
+    (
+        "shares_float",
+        "daily_shares",
+        fmp_stub._shares_float("SYM", {}),
+        lambda body: body,
+    ),
+    ("ratios", "ratios", fmp_stub._ratios("SYM", {}), lambda body: body),
+]
+
+
+def _time(func: Callable[[], Any]) -> float:
+    runs = 20
+    return timeit.timeit(func, number=runs) / runs * 1e3
+
+
+def main() -> None:
+    print(f"orjson {'installed' if orjson is not None else 'not installed'}")
+    for endpoint, dataset, body, records in PAYLOADS:
+        raw = json.dumps(body).encode()
+        columns = Company.COLUMNS[dataset]
+
+        before = pd.DataFrame(records(json.loads(raw)))
+        after = Decoding.to_frame(records(Decoding.loads(raw)))
+        assert before.equals(after), endpoint
+
+        timings = {
+            "before": _time(lambda: pd.DataFrame(records(json.loads(raw)))),
+            "after": _time(lambda: Decoding.to_frame(records(Decoding.loads(raw)))),
+            "after (compact)": _time(
+                lambda: Decoding.to_frame(records(Decoding.loads(raw)), columns)
+            ),
+        }
+        print(
+            f"{endpoint:<28} {len(raw) / 2**20:5.1f} MiB "
+            + " ".join(f"{label}={ms:6.1f} ms" for label, ms in timings.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
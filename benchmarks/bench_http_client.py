@@ -0,0 +1,67 @@
+"""
+Compares connection handshakes and wall-clock time per Company.load with a new
+client per request (the previous behaviour) against the shared pooled client.
+
+Usage: python -m benchmarks.bench_http_client [loads]
+"""
+
+import os
+import sys
+import time
+from typing import Any
+
+import httpx
+
+from analysis.api.base_api import BaseAPI
+from analysis.models.company import Company
+from benchmarks.fmp_stub import FMPStub
+
+
+async def _unpooled_get_async(
+    url, params: Any, use_cache: bool = True, refresh: bool = False
+) -> Any:
+    params["apikey"] = BaseAPI._get_api_key()
+    async with httpx.AsyncClient() as client:
+        response = await client.get(BaseAPI._get_base_url() + url, params=params)
+        return response.json()
+
+
+async def _load_many(loads: int) -> None:
+    for idx in range(loads):
+        await Company.load(f"SYM{idx}")
+
+
+def _measure(stub: FMPStub, label: str, loads: int) -> None:
+    stub.reset_counters()
+    start = time.perf_counter()
+    BaseAPI.run(_load_many(loads))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<10} handshakes/load={stub.connections / loads:6.2f} "
+        f"requests/load={stub.requests / loads:6.2f} "
+        f"ms/load={elapsed / loads * 1000:8.2f}"
+    )
+
+
+def main() -> None:
+    loads = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    os.environ.setdefault("FMP_API_KEY", "benchmark")
+    os.environ["FMP_CACHE_DISABLED"] = "1"
+    # Measure connection reuse rather than the FMP rate limit.
+    BaseAPI.configure_rate_limit(requests_per_minute=1_000_000, burst=1_000)
+
+    with FMPStub(latency=0.005) as stub:
+        os.environ["FMP_BASE_URL"] = stub.base_url
+
+        pooled_get_async = BaseAPI._get_async
+        BaseAPI._get_async = staticmethod(_unpooled_get_async)  # type: ignore
+        try:
+            _measure(stub, "before", loads)
+        finally:
+            BaseAPI._get_async = pooled_get_async  # type: ignore
+
+        _measure(stub, "after", loads)
+
+
+if __name__ == "__main__":
+    main()
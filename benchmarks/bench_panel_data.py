@@ -0,0 +1,77 @@
+"""
+Compares screener metrics computed per company with CompanyData against the
+vectorized PanelData engine, checking that both produce the same values.
+
+Usage: python -m benchmarks.bench_panel_data [companies]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis.data.company_data import CompanyData
+from analysis.data.panel_data import PanelData
+from analysis.models.company import Company
+
+
+def _company(symbol: str, rng: np.random.Generator) -> Company:
+    empty = pd.DataFrame()
+    days = int(rng.integers(0, 120))
+    quarters = int(rng.integers(0, 17))
+    daily_chart = pd.DataFrame({"adjClose": rng.uniform(0, 100, days).round(2)})
+    income = pd.DataFrame({"revenue": rng.integers(0, 10**9, quarters)})
+    ratios = pd.DataFrame(
+        {
+            "symbol": [symbol] * quarters,
+            "priceEarningsRatio": rng.normal(15, 10, quarters),
+            "priceToBookRatio": rng.normal(3, 2, quarters),
+        }
+    )
+    return Company(
+        symbol, empty, income, empty, daily_chart, empty, ratios, {}, {}, empty
+    )
+
+
+def _per_company(companies: list[Company]) -> pd.DataFrame:
+    rows = []
+    for company in companies:
+        rows.append(
+            {
+                "1 Week Change": CompanyData.get_daily_change(company, 5),
+                "1 Month Change": CompanyData.get_daily_change(company, 20),
+                "3 Month Change": CompanyData.get_daily_change(company, 60),
+                "Revenue Change": CompanyData.get_last_revenue_change(company),
+                "Revenue Change (%)": CompanyData.get_last_revenue_percentage_change(
+                    company
+                ),
+                "P/E": CompanyData.get_last_ratio_value(company, "priceEarningsRatio"),
+                "P/B": CompanyData.get_last_ratio_value(company, "priceToBookRatio"),
+            }
+        )
+    return pd.DataFrame(rows, index=[company.symbol for company in companies])
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    rng = np.random.default_rng(0)
+    companies = [_company(f"SYM{idx}", rng) for idx in range(count)]
+
+    start = time.process_time()
+    expected = _per_company(companies)
+    per_company = time.process_time() - start
+
+    start = time.process_time()
+    actual = PanelData(companies).get_screener_metrics()
+    panel = time.process_time() - start
+
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    print(
+        f"{count} companies: per-company {per_company:6.3f} s CPU, "
+        f"panel {panel:6.3f} s CPU ({per_company / panel:5.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
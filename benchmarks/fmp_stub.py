@@ -0,0 +1,473 @@
+"""
+A local stand-in for the Financial Modeling Prep API.
+
+Serves synthetic responses shaped like the real endpoints so that the API layer
+can be exercised without an API key or network access. Values vary per symbol
+but are the same on every request. Responses recorded from the real API are
+served instead where available.
+
+Usage: python -m benchmarks.fmp_stub [--port PORT] [--latency SECONDS]
+    [--error-rate RATE] [--universe SYMBOLS] [--recordings DIR [--record]]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+
+def _dates(count: int, step_days: int) -> list[str]:
+    today = datetime.date.today()
+    return [
+        (today - datetime.timedelta(days=idx * step_days)).strftime("%Y-%m-%d")
+        for idx in range(count)
+    ]
+
+
+def _rng(symbol: str) -> random.Random:
+    # Seeding with a string is deterministic across processes.
+    return random.Random(symbol)
+
+
+def _profile(symbols: str, params: dict) -> list[dict]:
+    return [
+        {
+            "symbol": symbol,
+            "companyName": f"{symbol} Inc.",
+            "mktCap": _market_cap(symbol),
+            "ipoDate": f"{_rng(symbol).randint(1990, 2024)}-06-01",
+            "fullTimeEmployees": "1200",
+            "address": "1 Main Street",
+            "city": "Springfield",
+            "state": "CA",
+            "sector": "Technology",
+            "industry": "Software",
+            "website": "https://example.com",
+            "exchangeShortName": "NASDAQ",
+            "description": "A synthetic company.",
+        }
+        for symbol in symbols.split(",")
+    ]
+
+
+def _market_cap(symbol: str) -> int:
+    return int(10 ** _rng(symbol).uniform(7, 12))
+
+
+def _quote(symbols: str, params: dict) -> list[dict]:
+    return [
+        {
+            "symbol": symbol,
+            "price": 42.0,
+            "marketCap": _market_cap(symbol),
+            "earningsAnnouncement": "2030-01-30T21:00:00.000+0000",
+        }
+        for symbol in symbols.split(",")
+    ]
+
+
+def _daily_chart(symbol: str, params: dict) -> dict:
+    level = _rng(symbol).uniform(5, 500)
+    historical = [
+        {
+            "date": date,
+            "open": level + idx % 5,
+            "high": level + idx % 7 + 1.5,
+            "low": level + idx % 3 - 1.5,
+            "close": level + idx % 7,
+            "adjClose": level + idx % 7,
+            "volume": 1_000_000 + idx,
+            "unadjustedVolume": 1_000_000 + idx,
+            "change": 0.25,
+            "changePercent": 0.5,
+            "vwap": level + idx % 7,
+            "label": date,
+            "changeOverTime": 0.005,
+        }
+        for idx, date in enumerate(_dates(int(params.get("timeseries", 2_500)), 1))
+        if date >= params.get("from", "")
+    ]
+    return {"symbol": symbol, "historical": historical}
+
+
+def _shares_float(symbol: str, params: dict) -> list[dict]:
+    return [
+        {
+            "symbol": symbol,
+            "date": f"{date} 00:00:00",
+            "freeFloat": 85.5,
+            "floatShares": 100_000_000 + idx,
+            "outstandingShares": 120_000_000,
+            "source": "https://www.sec.gov/",
+        }
+        for idx, date in enumerate(_dates(500, 1))
+    ]
+
+
+# Statement fields that the app never reads, included so responses have the
+# width of the real ones.
+_UNUSED_STATEMENT_FIELDS = [
+    "costOfRevenue",
+    "grossProfit",
+    "grossProfitRatio",
+    "generalAndAdministrativeExpenses",
+    "otherExpenses",
+    "operatingExpenses",
+    "costAndExpenses",
+    "interestIncome",
+    "interestExpense",
+    "depreciationAndAmortization",
+    "ebitda",
+    "operatingIncome",
+    "incomeTaxExpense",
+    "eps",
+    "epsdiluted",
+    "weightedAverageShsOut",
+    "shortTermInvestments",
+    "netReceivables",
+    "inventory",
+    "totalCurrentAssets",
+    "propertyPlantEquipmentNet",
+    "goodwill",
+    "intangibleAssets",
+    "totalNonCurrentAssets",
+    "accountPayables",
+    "shortTermDebt",
+    "totalCurrentLiabilities",
+    "longTermDebt",
+    "totalStockholdersEquity",
+    "operatingCashFlow",
+    "capitalExpenditure",
+    "dividendsPaid",
+]
+
+
+def _statements(symbol: str, params: dict) -> list[dict]:
+    return [
+        {
+            "symbol": symbol,
+            "date": date,
+            "reportedCurrency": "USD",
+            "cik": "0000000001",
+            "fillingDate": date,
+            "acceptedDate": f"{date} 16:05:00",
+            "calendarYear": date[:4],
+            "period": f"Q{idx % 4 + 1}",
+            "link": f"https://www.sec.gov/Archives/edgar/data/{symbol}/{date}.htm",
+            "finalLink": f"https://www.sec.gov/Archives/edgar/data/{symbol}/{date}.htm",
+            "revenue": 1_000_000 + idx * 10_000,
+            "netIncome": 100_000 - idx * 1_000,
+            "researchAndDevelopmentExpenses": 200_000,
+            "sellingAndMarketingExpenses": 150_000,
+            "cashAndCashEquivalents": 5_000_000,
+            "totalAssets": 20_000_000,
+            "totalLiabilities": 8_000_000,
+            "netDebt": 1_000_000,
+            "freeCashFlow": -250_000 + idx * 5_000,
+            **{field: 1_000_000.0 + idx for field in _UNUSED_STATEMENT_FIELDS},
+        }
+        for idx, date in enumerate(_dates(int(params.get("limit", 40)), 91))
+    ]
+
+
+def _ratios(symbol: str, params: dict) -> list[dict]:
+    rng = _rng(symbol)
+    pe, pb = rng.uniform(-20, 80), rng.uniform(0.2, 12)
+    return [
+        {
+            "symbol": symbol,
+            "date": date,
+            "priceEarningsRatio": pe + idx,
+            "priceToBookRatio": pb + idx / 10,
+        }
+        for idx, date in enumerate(_dates(40, 91))
+    ]
+
+
+def _key_metrics(symbol: str, params: dict) -> list[dict]:
+    return [
+        {
+            "symbol": symbol,
+            "date": date,
+            "period": f"Q{idx % 4 + 1}",
+            "revenuePerShare": 3.5 + idx / 100,
+            "netIncomePerShare": 0.4 - idx / 1000,
+            "marketCap": _market_cap(symbol),
+            "peRatio": 12.5 + idx,
+            "debtToEquity": 0.6,
+            "currentRatio": 1.8,
+        }
+        for idx, date in enumerate(_dates(40, 91))
+    ]
+
+
+def _employee_count(symbol: str, params: dict) -> list[dict]:
+    return [
+        {
+            "symbol": symbol,
+            "periodOfReport": date,
+            "filingDate": date,
+            "formType": "10-K",
+            "employeeCount": 1_200 - idx * 50,
+        }
+        for idx, date in enumerate(_dates(10, 365))
+    ]
+
+
+def _stock_news(symbol: str, params: dict) -> list[dict]:
+    tickers = params.get("tickers", "SYM0").split(",")
+    return [
+        {
+            "symbol": tickers[idx % len(tickers)],
+            "publishedDate": f"{date} 12:00:00",
+            "title": f"Synthetic headline {idx}",
+            "image": "https://example.com/image.jpg",
+            "site": "example.com",
+            "text": "Synthetic news text. " * 10,
+            "url": f"https://example.com/news/{idx}",
+        }
+        for idx, date in enumerate(_dates(int(params.get("limit", 50)), 1))
+    ]
+
+
+def _estimates(symbol: str, params: dict) -> list[dict]:
+    return [
+        {"symbol": symbol, "date": date, "estimatedRevenueAvg": 1_500_000 - idx}
+        for idx, date in enumerate(_dates(20, -91))
+    ]
+
+
+# Maps a path pattern to a response builder. The first group is the symbol.
+ROUTES: list[tuple[re.Pattern, Callable[[str, dict], Any]]] = [
+    (re.compile(r"/api/v3/profile/([^/]+)"), _profile),
+    (re.compile(r"/api/v3/quote/([^/]+)"), _quote),
+    (re.compile(r"/api/v3/historical-price-full/([^/]+)"), _daily_chart),
+    (re.compile(r"/api/v4/historical/shares_float()"), _shares_float),
+    (re.compile(r"/api/v3/balance-sheet-statement/([^/]+)"), _statements),
+    (re.compile(r"/api/v3/income-statement/([^/]+)"), _statements),
+    (re.compile(r"/api/v3/cash-flow-statement/([^/]+)"), _statements),
+    (re.compile(r"/api/v3/ratios/([^/]+)"), _ratios),
+    (re.compile(r"/api/v3/key-metrics/([^/]+)"), _key_metrics),
+    (re.compile(r"/api/v3/analyst-estimates/([^/]+)"), _estimates),
+    (re.compile(r"/api/v4/historical/employee_count()"), _employee_count),
+    (re.compile(r"/api/v3/stock_news()"), _stock_news),
+]
+
+
+class FMPStub:
+    """
+    Runs the stand-in server on a background thread.
+
+    Counts opened connections and served requests so callers can measure
+    connection reuse.
+
+    :param latency: Mean seconds added to each response, varied by +/-50%
+    :param error_rate: Fraction of requests answered with a 503
+    :param universe: Number of symbols (SYM0, SYM1, ...) listed by the stock
+        screener
+    :param recordings: Directory of recorded responses, one JSON file per path
+        (e.g. v3/quote/AAPL.json), served regardless of query parameters
+    :param record: Fetch paths missing from the recordings from the real API,
+        using FMP_API_KEY, and save them, instead of synthesizing them
+    :param port: Port to listen on, any free one by default
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        universe: int = 1_000,
+        recordings: Optional[str] = None,
+        record: bool = False,
+        port: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.universe = universe
+        self.recordings = recordings
+        self.record = record
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.routes = [
+            *ROUTES,
+            (re.compile(r"/api/v3/stock-screener()"), self._stock_screener),
+        ]
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """
+        Returns the URL to use in place of the real API base URL.
+        """
+        host, port = self._server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}/api"
+
+    def reset_counters(self) -> None:
+        """
+        Resets the connection, request and error counters.
+        """
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+            self.errors = 0
+
+    def __enter__(self) -> "FMPStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, path: str, params: dict) -> tuple[int, Any]:
+        """
+        Returns the status and body of the response to a request.
+        """
+        if self.recordings is not None:
+            recorded = self._get_recording(self.recordings, path, params)
+            if recorded is not None:
+                return 200, recorded
+
+        for pattern, builder in self.routes:
+            match = pattern.fullmatch(path)
+            if match:
+                symbol = match.group(1) or params.get("symbol", "")
+                return 200, builder(symbol, params)
+        return 404, {"Error Message": "Unknown endpoint"}
+
+    def _stock_screener(self, symbol: str, params: dict) -> list[dict]:
+        more_than = float(params.get("marketCapMoreThan", 0))
+        less_than = float(params.get("marketCapLowerThan", float("inf")))
+        limit = int(params.get("limit", self.universe))
+        symbols = [
+            candidate
+            for candidate in (f"SYM{idx}" for idx in range(self.universe))
+            if more_than < _market_cap(candidate) < less_than
+        ]
+        return [
+            {
+                "symbol": symbol,
+                "companyName": f"{symbol} Inc.",
+                "marketCap": _market_cap(symbol),
+                "sector": "Technology",
+                "industry": "Software",
+                "price": 42.0,
+                "exchangeShortName": "NASDAQ",
+                "country": "US",
+                "isEtf": False,
+                "isActivelyTrading": True,
+            }
+            for symbol in symbols[:limit]
+        ]
+
+    def _get_recording(self, recordings: str, path: str, params: dict) -> Optional[Any]:
+        file = os.path.join(recordings, path.removeprefix("/api/") + ".json")
+        if os.path.exists(file):
+            with open(file) as f:
+                return json.load(f)
+        if not self.record:
+            return None
+
+        response = requests.get(
+            "https://financialmodelingprep.com" + path,
+            params={**params, "apikey": os.environ["FMP_API_KEY"]},
+            timeout=30,
+        )
+        if not response.ok:
+            return None
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, "w") as f:
+            f.write(response.text)
+        return response.json()
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self) -> None:
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency * random.uniform(0.5, 1.5))
+
+                parsed = urlparse(self.path)
+                params = {
+                    key: values[0]
+                    for key, values in parse_qs(parsed.query).items()
+                    if key != "apikey"
+                }
+                if stub.error_rate and random.random() < stub.error_rate:
+                    with stub._lock:
+                        stub.errors += 1
+                    status, body = 503, {"Error Message": "Service Unavailable"}
+                else:
+                    status, body = stub.respond(parsed.path, params)
+
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the FMP API.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--universe", type=int, default=1_000)
+    parser.add_argument("--recordings")
+    parser.add_argument(
+        "--record", action="store_true", help="save missing responses from the API"
+    )
+    args = parser.parse_args()
+    if args.record and not args.recordings:
+        parser.error("--record requires --recordings")
+
+    stub = FMPStub(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        universe=args.universe,
+        recordings=args.recordings,
+        record=args.record,
+        port=args.port,
+    )
+    # The first line tells callers (e.g. the benchmark suite) where to connect.
+    print(stub.base_url, flush=True)
+    with stub:
+        try:
+            stub._thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
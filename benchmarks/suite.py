@@ -0,0 +1,262 @@
+"""
+Benchmarks loading companies, screening, building profiles, computing metrics
+and building charts against the FMP stub, run in a separate process so it
+doesn't compete with the benchmarks for the GIL.
+
+Reports throughput, p50/p99 latency and peak traced memory per case. With
+--baseline, exits with status 1 if any case is worse than the stored results by
+more than the tolerance.
+
+Usage: python -m benchmarks.suite [--sizes 100,1000,5000] [--latency SECONDS]
+    [--error-rate RATE] [--baseline FILE] [--save-baseline FILE]
+    [--tolerance FRACTION]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from analysis.api.base_api import BaseAPI
+from analysis.api.pipeline_stats import PipelineStats
+from analysis.api.screener_api import ScreenerAPI
+from analysis.charts.company_charts import CompanyCharts
+from analysis.data.company_data import CompanyData
+from analysis.models.company import Company
+
+# Number of companies loaded for the load, metrics and chart cases, and of
+# symbols in the profiles case.
+COMPANIES = 50
+PROFILES = 200
+
+# The screener cases keep companies with a P/E below this, so the planner
+# rejects some of them.
+PE_RATIO_LESS_THAN = 40
+
+# Measurements where a higher value is a regression, and where a lower one is.
+_HIGHER_IS_WORSE = ("p50_ms", "p99_ms", "peak_mib")
+_LOWER_IS_WORSE = ("per_sec",)
+
+T = TypeVar("T")
+
+# A benchmark case, returning the latency of each call it made.
+Case = Callable[[], Coroutine[Any, Any, list[float]]]
+
+
+async def _timed_calls(
+    items: list[T], call: Callable[[T], Awaitable[object]]
+) -> list[float]:
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        await call(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def _load_companies(companies: list[Company]) -> list[float]:
+    async def load(symbol: str) -> None:
+        companies.append(await Company.load(symbol))
+
+    return await _timed_calls([f"SYM{idx}" for idx in range(COMPANIES)], load)
+
+
+async def _search(size: int) -> list[float]:
+    # ScreenerAPI.search collects these same rows, without exposing the stats.
+    stats = PipelineStats()
+    async for _ in ScreenerAPI.search_stream(
+        pe_ratio_less_than=PE_RATIO_LESS_THAN, limit=size, stats=stats
+    ):
+        pass
+    return stats.latencies
+
+
+async def _populate_profiles() -> list[float]:
+    stats = PipelineStats()
+    symbols = [f"SYM{idx}" for idx in range(COMPANIES, COMPANIES + PROFILES)]
+    await ScreenerAPI.populate_profiles(symbols, stats=stats)
+    return stats.latencies
+
+
+async def _company_data(companies: list[Company]) -> list[float]:
+    async def metrics(company: Company) -> None:
+        CompanyData.get_profile(company)
+        CompanyData.get_company_cash_runway(company)
+        ScreenerAPI.get_profile_row(company)
+
+    return await _timed_calls(companies, metrics)
+
+
+async def _charts(companies: list[Company]) -> list[float]:
+    async def charts(company: Company) -> None:
+        figures = [
+            CompanyCharts.get_revenue_estimates(company),
+            CompanyCharts.get_daily_chart(company),
+            CompanyCharts.get_shares_float(company),
+            CompanyCharts.get_rnd_selling(company),
+            CompanyCharts.get_simple_financials(company),
+            CompanyCharts.get_key_metrics(company),
+            await CompanyCharts.get_employee_count(company),
+        ]
+        # Serializing is part of sending a figure to the browser.
+        for figure in figures:
+            figure.to_json()
+
+    return await _timed_calls(companies, charts)
+
+
+def _measure(run: Case) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    latencies = BaseAPI.run(run())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies_ms = np.array(latencies) * 1e3
+    return {
+        "calls": len(latencies),
+        "per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 2),
+        "peak_mib": round(peak / 2**20, 1),
+    }
+
+
+def run_suite(sizes: list[int]) -> dict[str, dict]:
+    """
+    Runs every case against the API at FMP_BASE_URL and returns the results by
+    case name.
+    """
+    companies: list[Company] = []
+    cases: list[tuple[str, Case]] = [
+        ("company_load", lambda: _load_companies(companies)),
+        ("company_data", lambda: _company_data(companies)),
+        ("charts", lambda: _charts(companies)),
+        ("populate_profiles", _populate_profiles),
+        *(
+            (f"screener_search_{size}", lambda size=size: _search(size))
+            for size in sizes
+        ),
+    ]
+    results = {}
+    for name, run in cases:
+        results[name] = _measure(run)
+        print(f"{name}: {results[name]}", file=sys.stderr)
+    return results
+
+
+def find_regressions(
+    results: dict[str, dict], baseline: dict[str, dict], tolerance: float
+) -> list[str]:
+    """
+    Describes every measurement that is worse than in the baseline by more than
+    the tolerance. Cases missing from either side are skipped.
+
+    :param tolerance: Allowed relative change, e.g. 0.2 for 20%
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for key in _HIGHER_IS_WORSE + _LOWER_IS_WORSE:
+            value, reference = result[key], expected.get(key)
+            if not reference:
+                continue
+            change = (value - reference) / reference
+            if key in _LOWER_IS_WORSE:
+                change = -change
+            if change > tolerance:
+                regressions.append(
+                    f"{name} {key}: {value} vs {reference} ({change:+.0%} worse)"
+                )
+    return regressions
+
+
+def _start_stub(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.fmp_stub",
+            "--port",
+            "0",
+            "--latency",
+            str(args.latency),
+            "--error-rate",
+            str(args.error_rate),
+            "--universe",
+            str(max(args.sizes + [COMPANIES + PROFILES])),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    # The stub prints its base URL once it is listening.
+    assert stub.stdout is not None
+    return stub, stub.stdout.readline().strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[100, 1_000, 5_000],
+        help="screener universe sizes, comma-separated",
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--baseline", help="fail on regressions against this file")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    os.environ.setdefault("FMP_API_KEY", "benchmark")
+    os.environ["FMP_CACHE_DISABLED"] = "1"
+    os.environ["PRICE_STORE_PATH"] = tempfile.mkdtemp()
+    # Shared snapshots and statements would serve later cases from MongoDB.
+    os.environ.pop("MONGO_URI", None)
+    BaseAPI.configure_rate_limit(requests_per_minute=1_000_000, burst=1_000)
+
+    stub, base_url = _start_stub(args)
+    try:
+        os.environ["FMP_BASE_URL"] = base_url
+        results = run_suite(args.sizes)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print(pd.DataFrame(results).T.to_string())
+    settings = {
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "sizes": args.sizes,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["settings"] != settings:
+            print(f"Warning: baseline was run with {baseline['settings']}")
+        regressions = find_regressions(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
+import os
+import time
+
 import streamlit as st
 from dotenv import load_dotenv
 
+from analysis.api.metrics import Metrics
+from analysis.frontend.timing_panel import TimingPanel
+
 st.set_page_config(layout="wide")
 
 load_dotenv()
 
+# Metrics are off unless METRICS_ENABLED is set, and only served when
+# METRICS_PORT is set too.
+Metrics.enable(bool(os.environ.get("METRICS_ENABLED")))
+if Metrics.enabled and os.environ.get("METRICS_PORT"):
+    Metrics.serve(int(os.environ["METRICS_PORT"]))
+
 pg = st.navigation(
     [
         st.Page("analysis/frontend/company_overview/index.py", title="Company Overview"),
@@ -12,4 +24,8 @@ pg = st.navigation(
         st.Page("analysis/frontend/watchlist.py", title="Watchlist"),
     ]
 )
-pg.run()
+with Metrics.trace() as spans:
+    start = time.perf_counter()
+    pg.run()
+if Metrics.enabled:
+    TimingPanel.show(spans, time.perf_counter() - start)
@@ -0,0 +1,117 @@
+"""
+Shared fixtures, including an in-memory stand-in for PyMongo's async client
+built on mongomock.
+"""
+
+from typing import Any, Iterator
+
+import mongomock
+import pytest
+from pymongo import UpdateOne
+
+from analysis.persistence import async_data_store
+from analysis.persistence.async_data_store import AsyncDataStore
+
+
+class _FakeAsyncCursor:
+    """
+    Async iterator over a mongomock cursor.
+    """
+
+    def __init__(self, cursor: Any) -> None:
+        self._cursor = iter(cursor)
+
+    def __aiter__(self) -> "_FakeAsyncCursor":
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+class _FakeAsyncCollection:
+    """
+    Awaitable wrapper of the mongomock collection methods AsyncDataStore uses.
+    """
+
+    def __init__(self, collection: Any) -> None:
+        self._collection = collection
+
+    def find(self, *args: Any, **kwargs: Any) -> _FakeAsyncCursor:
+        return _FakeAsyncCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline: list[dict]) -> _FakeAsyncCursor:
+        return _FakeAsyncCursor(self._collection.aggregate(pipeline))
+
+    async def create_index(self, *args: Any, **kwargs: Any) -> str:
+        return self._collection.create_index(*args, **kwargs)
+
+    async def bulk_write(
+        self, operations: list[UpdateOne], ordered: bool = True
+    ) -> None:
+        # mongomock's bulk_write doesn't accept current PyMongo operations, so
+        # apply them one at a time.
+        for operation in operations:
+            self._collection.update_one(
+                operation._filter, operation._doc, upsert=operation._upsert
+            )
+
+    async def delete_many(self, *args: Any, **kwargs: Any) -> Any:
+        return self._collection.delete_many(*args, **kwargs)
+
+    async def find_one(self, *args: Any, **kwargs: Any) -> Any:
+        return self._collection.find_one(*args, **kwargs)
+
+    async def update_one(self, *args: Any, **kwargs: Any) -> Any:
+        return self._collection.update_one(*args, **kwargs)
+
+
+class _FakeAsyncDatabase:
+    def __init__(self, db: Any) -> None:
+        self._db = db
+        self.name = db.name
+
+    def __getitem__(self, name: str) -> _FakeAsyncCollection:
+        return _FakeAsyncCollection(self._db[name])
+
+
+class _FakeAsyncMongoClient:
+    """
+    Stands in for AsyncMongoClient. Every client shares one in-memory server, as
+    clients of the same deployment would.
+    """
+
+    server: Any = mongomock.MongoClient()
+    instances: list["_FakeAsyncMongoClient"] = []
+
+    def __init__(self, uri: str) -> None:
+        self.uri = uri
+        self.closed = False
+        _FakeAsyncMongoClient.instances.append(self)
+
+    def get_database(self, name: str) -> _FakeAsyncDatabase:
+        return _FakeAsyncDatabase(self.server.get_database(name))
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def fake_mongo(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[type[_FakeAsyncMongoClient]]:
+    """
+    Points AsyncDataStore at an empty in-memory "test" database, yielding the
+    fake client class so tests can inspect the server and the clients created.
+    """
+    monkeypatch.setenv("MONGO_URI", "mongodb://fake")
+    monkeypatch.setenv("MONGO_DB_NAME", "test")
+    monkeypatch.setattr(async_data_store, "AsyncMongoClient", _FakeAsyncMongoClient)
+    _FakeAsyncMongoClient.server.drop_database("test")
+    _FakeAsyncMongoClient.instances.clear()
+    AsyncDataStore._indexed.clear()
+    yield _FakeAsyncMongoClient
+    AsyncDataStore._clients.clear()
+    AsyncDataStore._indexed.clear()
@@ -0,0 +1,99 @@
+"""
+Tests for AsyncDataStore against an in-memory stand-in for PyMongo's async
+client, built on mongomock (see conftest.py).
+"""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from analysis.api.base_api import BaseAPI
+from analysis.persistence.async_data_store import AsyncDataStore
+
+pytestmark = pytest.mark.usefixtures("fake_mongo")
+
+
+def test_save_and_get_watchlist() -> None:
+    async def run() -> list[str]:
+        store = AsyncDataStore()
+        await store.save_to_watchlist("AAPL")
+        await store.save_many_to_watchlist(["MSFT", "AAPL", "MSFT"])
+        return await store.get_watchlist()
+
+    assert sorted(BaseAPI.run(run())) == ["AAPL", "MSFT"]
+
+
+def test_remove_from_watchlist() -> None:
+    async def run() -> list[str]:
+        store = AsyncDataStore()
+        await store.save_many_to_watchlist(["AAPL", "MSFT", "NVDA"])
+        await store.remove_from_watchlist("AAPL")
+        await store.remove_many_from_watchlist(["NVDA", "TSLA"])
+        return await store.get_watchlist()
+
+    assert BaseAPI.run(run()) == ["MSFT"]
+
+
+def test_replace_watchlist() -> None:
+    async def run() -> list[str]:
+        store = AsyncDataStore()
+        await store.save_many_to_watchlist(["AAPL", "MSFT"])
+        await store.replace_watchlist(["MSFT", "NVDA"])
+        return await store.get_watchlist()
+
+    assert sorted(BaseAPI.run(run())) == ["MSFT", "NVDA"]
+
+
+def test_holdings_are_separate_from_watchlist() -> None:
+    async def run() -> tuple[list[str], list[str]]:
+        store = AsyncDataStore()
+        await store.save_to_watchlist("AAPL")
+        await store.save_many_to_holdings(["MSFT", "NVDA"])
+        await store.remove_from_holdings("NVDA")
+        return await store.get_watchlist(), await store.get_holdings()
+
+    assert BaseAPI.run(run()) == (["AAPL"], ["MSFT"])
+
+
+def test_ensure_indexes_removes_duplicates(fake_mongo: Any) -> None:
+    watchlist = fake_mongo.server.get_database("test")["watchlist"]
+    watchlist.insert_many([{"symbol": "AAPL"}, {"symbol": "AAPL"}, {"symbol": "MSFT"}])
+
+    async def run() -> list[str]:
+        store = AsyncDataStore()
+        await store.ensure_indexes()
+        return await store.get_watchlist()
+
+    assert sorted(BaseAPI.run(run())) == ["AAPL", "MSFT"]
+    indexes = watchlist.index_information().values()
+    assert any(index["key"] == [("symbol", 1)] and index["unique"] for index in indexes)
+
+
+def test_client_is_shared_per_loop_and_closed_by_run(fake_mongo: Any) -> None:
+    async def run() -> None:
+        first, second = AsyncDataStore(), AsyncDataStore()
+        await first.save_to_watchlist("AAPL")
+        await second.get_watchlist()
+
+    BaseAPI.run(run())
+    BaseAPI.run(run())
+
+    # One client per event loop, each closed when BaseAPI.run finishes.
+    assert len(fake_mongo.instances) == 2
+    assert all(client.closed for client in fake_mongo.instances)
+    assert len(AsyncDataStore._clients) == 0
+
+
+def test_clients_are_not_shared_between_loops() -> None:
+    clients = []
+
+    async def run() -> None:
+        clients.append(AsyncDataStore._get_client())
+        clients.append(AsyncDataStore._get_client())
+
+    asyncio.run(run())
+    asyncio.run(run())
+
+    assert clients[0] is clients[1]
+    assert clients[1] is not clients[2]
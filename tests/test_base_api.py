@@ -0,0 +1,101 @@
+"""
+Tests for BaseAPI's per-event-loop async clients.
+"""
+
+import pathlib
+import threading
+from typing import Any, Iterator
+
+import httpx
+import pytest
+
+from analysis.api import base_api
+from analysis.api.base_api import BaseAPI
+from analysis.api.response_cache import ResponseCache
+
+
+class _RecordingAsyncClient(httpx.AsyncClient):
+    """
+    AsyncClient answering every request locally, which records the clients
+    created and whether each was closed.
+    """
+
+    instances: list["_RecordingAsyncClient"] = []
+    requests = 0
+    lock = threading.Lock()
+
+    def __init__(self, **kwargs: Any) -> None:
+        super().__init__(transport=httpx.MockTransport(self._handle), **kwargs)
+        with _RecordingAsyncClient.lock:
+            _RecordingAsyncClient.instances.append(self)
+
+    @staticmethod
+    def _handle(request: httpx.Request) -> httpx.Response:
+        with _RecordingAsyncClient.lock:
+            _RecordingAsyncClient.requests += 1
+            count = _RecordingAsyncClient.requests
+        return httpx.Response(200, json=[{"symbol": request.url.path, "n": count}])
+
+
+@pytest.fixture(autouse=True)
+def recording_client(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv("FMP_API_KEY", "test")
+    monkeypatch.setenv("FMP_CACHE_DISABLED", "1")
+    monkeypatch.setattr(base_api.httpx, "AsyncClient", _RecordingAsyncClient)
+    _RecordingAsyncClient.instances.clear()
+    _RecordingAsyncClient.requests = 0
+    BaseAPI.configure_rate_limit(requests_per_minute=60000, burst=1000)
+    yield
+    BaseAPI._clients.clear()
+    BaseAPI._rate_limiter = None
+
+
+async def _get_many(thread: int, count: int) -> None:
+    for i in range(count):
+        await BaseAPI._get_async(f"/v3/profile/T{thread}-{i}", {})
+
+
+def test_client_is_reused_within_a_run_and_closed_after() -> None:
+    BaseAPI.run(_get_many(0, 20))
+
+    assert len(_RecordingAsyncClient.instances) == 1
+    assert _RecordingAsyncClient.instances[0].is_closed
+    assert len(BaseAPI._clients) == 0
+
+
+def test_concurrent_runs_keep_their_own_clients() -> None:
+    errors: list[BaseException] = []
+
+    def run(thread: int) -> None:
+        for _ in range(3):
+            try:
+                BaseAPI.run(_get_many(thread, 20))
+            except BaseException as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # One client per BaseAPI.run, each closed by that run and no other.
+    assert not errors
+    assert len(_RecordingAsyncClient.instances) == 12
+    assert all(client.is_closed for client in _RecordingAsyncClient.instances)
+    assert len(BaseAPI._clients) == 0
+
+
+def test_refresh_skips_and_replaces_cached_response(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: pathlib.Path
+) -> None:
+    monkeypatch.delenv("FMP_CACHE_DISABLED")
+    monkeypatch.setattr(BaseAPI, "_cache", ResponseCache(str(tmp_path / "cache.db")))
+
+    async def get(refresh: bool = False) -> list[dict]:
+        return await BaseAPI._get_async("/v3/profile/AAPL", {}, refresh=refresh)
+
+    assert BaseAPI.run(get())[0]["n"] == 1
+    assert BaseAPI.run(get())[0]["n"] == 1
+    assert BaseAPI.run(get(refresh=True))[0]["n"] == 2
+    assert BaseAPI.run(get())[0]["n"] == 2
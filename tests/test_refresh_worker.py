@@ -0,0 +1,119 @@
+"""
+Tests that RefreshWorker survives failing stores and API calls.
+"""
+
+import asyncio
+from typing import Any, Optional
+
+import pytest
+
+from analysis.api.base_api import BaseAPI
+from analysis.models.company import Company
+from analysis.persistence.async_data_store import AsyncDataStore
+from analysis.persistence.snapshot_store import SnapshotStore
+from analysis.workers.refresh import RefreshWorker
+
+
+class _FailingSnapshots:
+    """
+    Snapshot store that fails every read and write for one symbol.
+    """
+
+    def __init__(self, failing: str) -> None:
+        self.failing = failing
+
+    async def get(self, symbol: str, field: str) -> Optional[Any]:
+        if symbol == self.failing:
+            raise ConnectionError("snapshot read failed")
+        return None
+
+    async def put(self, symbol: str, field: str, value: Any, ttl: float) -> bool:
+        if symbol == self.failing:
+            raise ConnectionError("snapshot write failed")
+        return True
+
+
+async def _load(symbol: str) -> dict:
+    return {"symbol": symbol, "earningsAnnouncement": None}
+
+
+@pytest.fixture
+def worker(fake_mongo: Any, monkeypatch: pytest.MonkeyPatch) -> RefreshWorker:
+    monkeypatch.setattr(
+        Company,
+        "get_loaders",
+        staticmethod(
+            lambda symbol: {field: lambda: _load(symbol) for field in Company.FIELDS}
+        ),
+    )
+    worker = RefreshWorker()
+    worker.statements = None
+    worker.snapshots = _FailingSnapshots("MSFT")  # type: ignore[assignment]
+    return worker
+
+
+def _checked_fields(symbol: str) -> dict[str, dict]:
+    async def run() -> dict[str, dict]:
+        return await RefreshWorker._get_state_times([symbol], "checked_at")
+
+    return BaseAPI.run(run()).get(symbol, {})
+
+
+def test_run_once_keeps_going_when_a_symbol_fails(worker: RefreshWorker) -> None:
+    BaseAPI.run(AsyncDataStore().save_many_to_watchlist(["AAPL", "MSFT", "NVDA"]))
+
+    BaseAPI.run(worker.run_once())
+
+    for symbol in ("AAPL", "NVDA"):
+        assert set(_checked_fields(symbol)) == set(SnapshotStore.TTLS)
+    assert _checked_fields("MSFT") == {}
+    assert worker.refreshed == 2 * len(SnapshotStore.TTLS)
+    assert worker.failed == len(SnapshotStore.TTLS)
+
+
+def test_run_once_survives_a_symbol_raising(
+    worker: RefreshWorker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    BaseAPI.run(AsyncDataStore().save_many_to_watchlist(["AAPL", "MSFT"]))
+    refresh_symbol = worker.refresh_symbol
+
+    async def flaky_refresh_symbol(symbol: str, checked: dict) -> None:
+        if symbol == "MSFT":
+            raise ValueError("bad payload")
+        await refresh_symbol(symbol, checked)
+
+    monkeypatch.setattr(worker, "refresh_symbol", flaky_refresh_symbol)
+
+    BaseAPI.run(worker.run_once())
+
+    assert set(_checked_fields("AAPL")) == set(SnapshotStore.TTLS)
+    assert worker.failed == 1
+
+
+def test_run_forever_backs_off_after_failed_passes(
+    worker: RefreshWorker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    outcomes: list[Optional[BaseException]] = [
+        ConnectionError("mongo down"),
+        ConnectionError("mongo down"),
+        None,
+        asyncio.CancelledError(),
+    ]
+    delays: list[float] = []
+
+    async def run_once() -> None:
+        outcome = outcomes.pop(0)
+        if outcome is not None:
+            raise outcome
+
+    async def sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(worker, "run_once", run_once)
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(worker.run_forever())
+
+    tick = RefreshWorker.TICK
+    assert delays == [2 * tick, 4 * tick, tick]
@@ -0,0 +1,44 @@
+"""
+Tests for the order of ScreenerAPI.search results.
+"""
+
+import asyncio
+from typing import Optional
+
+import pytest
+
+from analysis.api.base_api import BaseAPI
+from analysis.api.screener_api import ScreenerAPI
+
+# Symbols in the screener's market-cap order, with the later ones loading first.
+_UNIVERSE = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOG", "META"]
+
+
+class _ReversedPlanner:
+    """
+    Accepts every symbol but GOOG, finishing each load in reverse universe order.
+    """
+
+    async def run(self, symbol: str) -> Optional[str]:
+        await asyncio.sleep(0.01 * (len(_UNIVERSE) - _UNIVERSE.index(symbol)))
+        return None if symbol == "GOOG" else symbol
+
+
+async def _get_stock_screener(**kwargs: object) -> list[dict]:
+    return [{"symbol": symbol, "exchangeShortName": "NASDAQ"} for symbol in _UNIVERSE]
+
+
+def test_search_keeps_screener_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ScreenerAPI, "get_stock_screener", _get_stock_screener)
+    monkeypatch.setattr(
+        ScreenerAPI, "get_search_planner", lambda **kwargs: _ReversedPlanner()
+    )
+    monkeypatch.setattr(
+        ScreenerAPI, "get_profile_row", lambda symbol: {"Symbol": symbol, "P/E": 1.0}
+    )
+
+    results = BaseAPI.run(ScreenerAPI.search())
+
+    assert list(results["Symbol"]) == ["AAPL", "MSFT", "NVDA", "AMZN", "META"]
+    assert list(results.columns) == ["Symbol", "P/E"]
+    assert list(results.index) == [0, 1, 2, 3, 4]